@@ -1,6 +1,6 @@
 """
 Analytics — Black-Scholes pricing, Greeks, robust IV solver.
-Pure math. Imports only app_config and standard libs.
+Pure math. Imports only app_config, iv_kernel and standard libs.
 
 v8.0 changes:
 - IV solver uses Newton-Raphson + Brent's fallback
@@ -10,16 +10,52 @@ v8.0 changes:
 """
 
 import numpy as np
-from scipy.stats import norm
+from math import erf, exp, isfinite, log as ln, sqrt, pi
 from scipy.optimize import brentq
-from typing import Dict, Tuple
+from scipy.special import ndtr
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 import logging
 
 import app_config as C
+from iv_kernel import (
+    _newton_iv_nb, _solve_iv_batch_nb, _chain_greeks_nb,
+    NR_CONVERGED, NR_VEGA_COLLAPSE, NR_MAX_ITER, NR_INVALID,
+    NR_SUB_INTRINSIC, NR_LB_EXACT, IV_FLOOR, LB_EXACT_TOL,
+    NUMBA_AVAILABLE
+)
 
 log = logging.getLogger(__name__)
 
+_INV_SQRT_2PI = 1.0 / sqrt(2.0 * pi)
+_SQRT2 = sqrt(2.0)
+
+
+def _ncdf(x: float) -> float:
+    """Standard normal CDF for a scalar (erf-based, no scipy dispatch)."""
+    return 0.5 * (1.0 + erf(x / _SQRT2))
+
+
+def _npdf(x: float) -> float:
+    """Standard normal PDF for a scalar."""
+    return _INV_SQRT_2PI * exp(-0.5 * x * x)
+
+
+# Option-type flags. Public functions accept "CE"/"PE" (or these ints) and
+# convert once on entry; everything below the API boundary uses the int.
+CE, PE = 1, 0
+
+
+def _parse_ot(ot) -> int:
+    """'CE'/'PE' or 1/0 → int flag (1 = call)."""
+    if isinstance(ot, str):
+        return CE if ot == "CE" else PE
+    return CE if ot else PE
+
+
+# Display precision for Greek columns, applied with DataFrame.round() at render time
+GREEK_DECIMALS = {'delta': 4, 'gamma': 6, 'theta': 4, 'vega': 4, 'rho': 6}
+
 
 def _d1_d2(spot: float, strike: float, tte: float, vol: float,
            r: float) -> Tuple[float, float]:
@@ -30,20 +66,25 @@ def _d1_d2(spot: float, strike: float, tte: float, vol: float,
         elif spot < strike:
             return -10.0, -10.0
         return 0.0, 0.0
-    sqrt_t = np.sqrt(tte)
-    d1 = (np.log(spot / strike) + (r + 0.5 * vol ** 2) * tte) / (vol * sqrt_t)
+    sqrt_t = sqrt(tte)
+    d1 = (ln(spot / strike) + (r + 0.5 * vol * vol) * tte) / (vol * sqrt_t)
     d2 = d1 - vol * sqrt_t
-    return np.clip(d1, -10.0, 10.0), np.clip(d2, -10.0, 10.0)
+    return min(max(d1, -10.0), 10.0), min(max(d2, -10.0), 10.0)
 
 
 def bs_price(spot: float, strike: float, tte: float, vol: float,
              option_type: str, r: float = C.RISK_FREE_RATE) -> float:
     """Black-Scholes option price."""
+    return _bs_price(spot, strike, tte, vol, _parse_ot(option_type), r)
+
+
+def _bs_price(spot: float, strike: float, tte: float, vol: float,
+              is_call: int, r: float) -> float:
     d1, d2 = _d1_d2(spot, strike, tte, vol, r)
-    disc = np.exp(-r * tte)
-    if option_type == "CE":
-        return max(0.0, spot * norm.cdf(d1) - strike * disc * norm.cdf(d2))
-    return max(0.0, strike * disc * norm.cdf(-d2) - spot * norm.cdf(-d1))
+    disc = exp(-r * tte)
+    if is_call:
+        return max(0.0, spot * _ncdf(d1) - strike * disc * _ncdf(d2))
+    return max(0.0, strike * disc * _ncdf(-d2) - spot * _ncdf(-d1))
 
 
 def bs_vega_raw(spot: float, strike: float, tte: float, vol: float,
@@ -52,7 +93,7 @@ def bs_vega_raw(spot: float, strike: float, tte: float, vol: float,
     if tte < 1e-10:
         return 0.0
     d1, _ = _d1_d2(spot, strike, tte, vol, r)
-    return spot * norm.pdf(d1) * np.sqrt(tte)
+    return spot * _npdf(d1) * sqrt(tte)
 
 
 def calculate_greeks(spot: float, strike: float, tte: float, vol: float,
@@ -60,44 +101,125 @@ def calculate_greeks(spot: float, strike: float, tte: float, vol: float,
     """
     All Greeks for a single option.
     Theta is daily. Vega is per 1% vol move. Rho is per 1% rate move.
+    Values are full precision; round at display time (see GREEK_DECIMALS).
     """
+    is_call = _parse_ot(option_type)
     if tte < 1e-10:
-        if option_type == "CE":
+        if is_call:
             d = 1.0 if spot > strike else 0.0
         else:
             d = -1.0 if spot < strike else 0.0
         return {'delta': d, 'gamma': 0.0, 'theta': 0.0, 'vega': 0.0, 'rho': 0.0}
 
     d1, d2 = _d1_d2(spot, strike, tte, vol, r)
-    sqrt_t = np.sqrt(tte)
-    n_d1 = norm.pdf(d1)
-    disc = np.exp(-r * tte)
+    sqrt_t = sqrt(tte)
+    n_d1 = _npdf(d1)
+    k_disc = strike * exp(-r * tte)
+    N_d1, N_d2 = _ncdf(d1), _ncdf(d2)
+    decay = -spot * n_d1 * vol / (2 * sqrt_t)
 
     gamma = n_d1 / (spot * vol * sqrt_t) if (spot * vol * sqrt_t) > 0 else 0.0
     vega = spot * n_d1 * sqrt_t / 100.0
 
-    if option_type == "CE":
-        delta = norm.cdf(d1)
-        theta = (-spot * n_d1 * vol / (2 * sqrt_t) -
-                 r * strike * disc * norm.cdf(d2)) / C.DAYS_PER_YEAR
-        rho = strike * tte * disc * norm.cdf(d2) / 100.0
+    if is_call:
+        delta = N_d1
+        theta = (decay - r * k_disc * N_d2) / C.DAYS_PER_YEAR
+        rho = k_disc * tte * N_d2 / 100.0
     else:
-        delta = norm.cdf(d1) - 1
-        theta = (-spot * n_d1 * vol / (2 * sqrt_t) +
-                 r * strike * disc * norm.cdf(-d2)) / C.DAYS_PER_YEAR
-        rho = -strike * tte * disc * norm.cdf(-d2) / 100.0
+        delta = N_d1 - 1
+        theta = (decay + r * k_disc * (1.0 - N_d2)) / C.DAYS_PER_YEAR
+        rho = -k_disc * tte * (1.0 - N_d2) / 100.0
+
+    return {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega, 'rho': rho}
+
 
-    return {
-        'delta': round(delta, 4), 'gamma': round(gamma, 6),
-        'theta': round(theta, 4), 'vega': round(vega, 4),
-        'rho': round(rho, 6)
-    }
+_GREEK_KEYS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+
+
+def calculate_greeks_vec(spot, strike, tte, vol, is_call,
+                         r: float = C.RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """
+    Array form of calculate_greeks(): same units and edge cases, inputs
+    broadcast together, one ufunc pass per term across the whole chain.
+    """
+    spot, strike, tte, vol = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (spot, strike, tte, vol)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), spot.shape)
+
+    if NUMBA_AVAILABLE and spot.ndim == 1:
+        # One fused compiled pass instead of ~20 full-array temporaries
+        out = _chain_greeks_nb(*(np.ascontiguousarray(x) for x in (spot, strike, tte, vol, is_call)),
+                               r, float(C.DAYS_PER_YEAR))
+        return dict(zip(_GREEK_KEYS, out))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sqrt_t = np.sqrt(tte)
+        vol_t = vol * sqrt_t
+        d1 = (np.log(spot / strike) + (r + 0.5 * vol * vol) * tte) / vol_t
+        d2 = d1 - vol_t
+        degenerate = (tte < 1e-10) | (vol < 1e-10) | (spot <= 0) | (strike <= 0)
+        edge = np.sign(spot - strike) * 10.0
+        d1 = np.where(degenerate, edge, np.clip(d1, -10.0, 10.0))
+        d2 = np.where(degenerate, edge, np.clip(d2, -10.0, 10.0))
+
+        n_d1 = _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1)
+        N_d1, N_d2 = ndtr(d1), ndtr(d2)
+        k_disc = strike * np.exp(-r * tte)
+        decay = -spot * n_d1 * vol / (2 * sqrt_t)
+        denom = spot * vol_t
+
+        gamma = np.where(denom > 0, n_d1 / denom, 0.0)
+        vega = spot * n_d1 * sqrt_t / 100.0
+        delta = np.where(is_call, N_d1, N_d1 - 1)
+        theta = np.where(is_call, decay - r * k_disc * N_d2,
+                         decay + r * k_disc * (1.0 - N_d2)) / C.DAYS_PER_YEAR
+        rho = np.where(is_call, k_disc * tte * N_d2, -k_disc * tte * (1.0 - N_d2)) / 100.0
+
+    expired = tte < 1e-10
+    if expired.any():
+        intrinsic_delta = np.where(is_call, (spot > strike) * 1.0, (spot < strike) * -1.0)
+        delta = np.where(expired, intrinsic_delta, delta)
+        gamma, theta, vega, rho = (np.where(expired, 0.0, g) for g in (gamma, theta, vega, rho))
+    return {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega, 'rho': rho}
+
+
+def calculate_greeks_batch(records: List[Dict]) -> List[Dict[str, float]]:
+    """
+    Greeks for many contracts. Each record holds calculate_greeks() kwargs
+    (spot, strike, tte, vol, option_type[, r]). Output order matches input.
+    Records are packed into arrays and priced by calculate_greeks_vec (the
+    compiled chain kernel when numba is available), one call per distinct r.
+    """
+    if not records:
+        return []
+    out: List[Dict[str, float]] = [None] * len(records)
+    by_rate: Dict[float, List[int]] = {}
+    for i, rec in enumerate(records):
+        by_rate.setdefault(rec.get('r', C.RISK_FREE_RATE), []).append(i)
+
+    for r, idx in by_rate.items():
+        cols = {k: np.array([records[i][k] for i in idx], dtype=np.float64)
+                for k in ('spot', 'strike', 'tte', 'vol')}
+        is_call = np.array([_parse_ot(records[i]['option_type']) == CE for i in idx])
+        greeks = calculate_greeks_vec(cols['spot'], cols['strike'], cols['tte'],
+                                      cols['vol'], is_call, r)
+        rows = zip(*(greeks[k].tolist() for k in _GREEK_KEYS))
+        for i, row in zip(idx, rows):
+            out[i] = dict(zip(_GREEK_KEYS, row))
+    return out
 
 
 # ═══════════════════════════════════════════════════════════════
 # IMPLIED VOLATILITY SOLVER
 # ═══════════════════════════════════════════════════════════════
 
+_NR_METHODS = {
+    NR_CONVERGED: "newton",
+    NR_VEGA_COLLAPSE: "nr_vega_collapse",
+    NR_MAX_ITER: "nr_max_iter",
+}
+
+
 @dataclass
 class IVResult:
     iv: float
@@ -114,73 +236,214 @@ def solve_iv(option_price: float, spot: float, strike: float,
     Hybrid IV solver: Newton-Raphson first, Brent's fallback.
     Always returns a result with convergence metadata.
     """
+    if not all(isfinite(x) for x in (option_price, spot, strike, tte)):
+        return IVResult(0.20, False, 0, "default", float('inf'))
     if option_price <= 0 or spot <= 0 or strike <= 0 or tte <= 0:
         return IVResult(0.20, False, 0, "default", float('inf'))
 
     # Intrinsic bound check
-    if option_type == "CE":
-        intrinsic = max(0, spot - strike * np.exp(-r * tte))
+    is_call = _parse_ot(option_type)
+    disc = exp(-r * tte)
+    if is_call:
+        intrinsic = max(0, spot - strike * disc)
     else:
-        intrinsic = max(0, strike * np.exp(-r * tte) - spot)
+        intrinsic = max(0, strike * disc - spot)
     if option_price < intrinsic * 0.99:
         return IVResult(0.01, False, 0, "sub_intrinsic", abs(option_price - intrinsic))
 
+    # ITM quote with no measurable time value: the vol floor reproduces it
+    if intrinsic > 0 and option_price - intrinsic < LB_EXACT_TOL:
+        return IVResult(IV_FLOOR, True, 0, "lb_exact", abs(option_price - intrinsic))
+
     # Phase 1: Newton-Raphson
-    nr = _newton_raphson_iv(option_price, spot, strike, tte, option_type, r)
+    nr = _newton_raphson_iv(option_price, spot, strike, tte, is_call, r)
     if nr.converged:
         return nr
 
     # Phase 2: Brent's method
-    return _brent_iv(option_price, spot, strike, tte, option_type, r)
+    return _brent_iv(option_price, spot, strike, tte, is_call, r)
 
 
-def estimate_implied_volatility(option_price: float, spot: float, strike: float,
-                                tte: float, option_type: str,
-                                r: float = C.RISK_FREE_RATE) -> float:
-    """Backward-compatible wrapper. Returns float IV."""
+def estimate_implied_volatility(option_price, spot, strike, tte, option_type,
+                                r: float = C.RISK_FREE_RATE):
+    """
+    Backward-compatible wrapper. Scalars in → float IV. Arrays in (option_type
+    as "CE"/"PE" strings or an is_call bool array) → IV array via solve_iv_batch.
+    """
+    if np.ndim(option_price):
+        ot = np.asarray(option_type)
+        is_call = (ot == "CE") if ot.dtype.kind in "UO" else ot.astype(bool)
+        return solve_iv_batch(option_price, spot, strike, tte, is_call, r)[0]
     return solve_iv(option_price, spot, strike, tte, option_type, r).iv
 
 
-def _newton_raphson_iv(target: float, spot: float, strike: float,
-                       tte: float, ot: str, r: float,
-                       max_iter: int = 50, tol: float = 1e-8) -> IVResult:
-    """Newton-Raphson with Brenner-Subrahmanyam initial guess."""
-    vol = np.sqrt(2 * np.pi / tte) * (target / spot)
-    vol = np.clip(vol, 0.01, 3.0)
-    diff = 0.0
+def solve_iv_batch(prices, spots, strikes, ttes, is_call,
+                   r: float = C.RISK_FREE_RATE
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized IV over a whole chain in one compiled, parallel pass.
+    spots/ttes may be scalars (broadcast to every row); is_call is a bool array.
+    Returns (iv, converged, iterations) arrays. Rows the Newton pass cannot
+    solve fall back to the scalar Brent solver.
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    n = prices.shape[0]
+
+    def _col(x, dtype):
+        return np.ascontiguousarray(np.broadcast_to(np.asarray(x, dtype=dtype), (n,)))
+
+    spots = _col(spots, np.float64)
+    strikes = _col(strikes, np.float64)
+    ttes = _col(ttes, np.float64)
+    is_call = _col(is_call, np.bool_)
+
+    solver = _solve_iv_batch_nb if NUMBA_AVAILABLE else _solve_iv_batch_np
+    iv, status, iters, _ = solver(prices, spots, strikes, ttes, is_call, r, 50, 1e-8)
+    converged = (status == NR_CONVERGED) | (status == NR_LB_EXACT)
+    for i in np.flatnonzero((status == NR_VEGA_COLLAPSE) | (status == NR_MAX_ITER)):
+        res = _brent_iv(prices[i], spots[i], strikes[i], ttes[i], int(is_call[i]), r)
+        iters[i] += res.iterations
+        if res.converged:
+            iv[i] = res.iv
+            converged[i] = True
+    return iv, converged, iters
+
+
+def _bs_price_vega_vec(spot, strike, log_sk, sqrt_t, disc, rt, vol, is_call):
+    """Array price and raw vega; every transcendental is one ufunc call."""
+    vol_t = vol * sqrt_t
+    d1_raw = (log_sk + rt + 0.5 * vol_t * vol_t) / vol_t
+    d1 = np.clip(d1_raw, -10.0, 10.0)
+    d2 = np.clip(d1_raw - vol_t, -10.0, 10.0)
+    kd = strike * disc
+    call = spot * ndtr(d1) - kd * ndtr(d2)
+    put = kd * ndtr(-d2) - spot * ndtr(-d1)
+    price = np.maximum(np.where(is_call, call, put), 0.0)
+    vega = spot * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * sqrt_t
+    return price, vega
+
+
+def _newton_iv_vec(targets, spots, strikes, log_sk, sqrt_t, disc, rt, is_call,
+                   vol, max_iter, tol):
+    """
+    Array form of iv_kernel._newton_iv_from_nb: bracketed Newton from the
+    given start vols, bisecting [lo, hi] whenever vega vanishes or the step
+    leaves the bracket. Returns (vol, status, iterations, abs_price_error).
+    """
+    n = targets.shape[0]
+    out_vol = vol.copy()
+    status = np.full(n, NR_MAX_ITER, dtype=np.int64)
+    iters = np.full(n, max_iter, dtype=np.int64)
+    err = np.full(n, np.inf)
+    lo, hi = np.full(n, IV_FLOOR), np.full(n, 5.0)
+    idx = np.arange(n)
 
     for i in range(max_iter):
-        price = bs_price(spot, strike, tte, vol, ot, r)
-        diff = price - target
-        if abs(diff) < tol:
-            return IVResult(vol, True, i + 1, "newton", abs(diff))
-        vega = bs_vega_raw(spot, strike, tte, vol, r)
-        if vega < 1e-12:
-            return IVResult(vol, False, i + 1, "nr_vega_collapse", abs(diff))
-        step = diff / vega
-        if abs(step) > vol * 0.5:
-            step = np.sign(step) * vol * 0.5
-        vol_new = np.clip(vol - step, 0.001, 5.0)
-        if abs(vol_new - vol) < 1e-10:
-            return IVResult(vol_new, True, i + 1, "newton", abs(diff))
-        vol = vol_new
-
-    return IVResult(vol, False, max_iter, "nr_max_iter", abs(diff))
+        if idx.size == 0:
+            break
+        price, vega = _bs_price_vega_vec(spots[idx], strikes[idx], log_sk[idx], sqrt_t[idx],
+                                         disc[idx], rt[idx], vol, is_call[idx])
+        diff = price - targets[idx]
+        out_vol[idx], err[idx] = vol, np.abs(diff)
+
+        done = np.abs(diff) < tol
+        hi[idx] = np.where(diff > 0, vol, hi[idx])
+        lo[idx] = np.where(diff > 0, lo[idx], vol)
+        step = np.clip(diff / np.where(vega >= 1e-12, vega, 1.0), -0.5 * vol, 0.5 * vol)
+        newton = vol - step
+        use_newton = (vega >= 1e-12) & (lo[idx] < newton) & (newton < hi[idx])
+        vol_new = np.where(use_newton, newton, 0.5 * (lo[idx] + hi[idx]))
+        flat = ~done & (np.abs(vol_new - vol) < 1e-10)
+        out_vol[idx[flat]] = vol_new[flat]
+
+        stop = done | flat
+        status[idx[stop]] = NR_CONVERGED
+        iters[idx[stop]] = i + 1
+        idx, vol = idx[~stop], vol_new[~stop]
+
+    return out_vol, status, iters, err
+
+
+def _solve_iv_batch_np(prices, spots, strikes, ttes, is_call, r, max_iter, tol):
+    """
+    NumPy twin of iv_kernel._solve_iv_batch_nb for when numba is missing:
+    the same guards, sigma_c start, bracketed Newton and Brenner-Subrahmanyam
+    retry, iterated on the still-active rows.
+    """
+    n = prices.shape[0]
+    iv = np.full(n, 0.20)
+    status = np.full(n, NR_INVALID, dtype=np.int64)
+    iters = np.zeros(n, dtype=np.int64)
+    err = np.full(n, np.inf)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        # NaN fails the > 0 checks but Inf passes, so test finiteness too
+        valid = ((prices > 0) & (spots > 0) & (strikes > 0) & (ttes > 0)
+                 & np.isfinite(prices) & np.isfinite(spots)
+                 & np.isfinite(strikes) & np.isfinite(ttes))
+        rt = r * ttes
+        disc = np.exp(-rt)
+        log_sk = np.log(spots / strikes)
+        sqrt_t = np.sqrt(ttes)
+        kd = strikes * disc
+
+        intrinsic = np.where(is_call, np.maximum(spots - kd, 0.0), np.maximum(kd - spots, 0.0))
+        sub = valid & (prices < intrinsic * 0.99)
+        iv[sub], status[sub] = 0.01, NR_SUB_INTRINSIC
+        err[sub] = np.abs(prices - intrinsic)[sub]
+
+        lb = valid & ~sub & (intrinsic > 0) & (prices - intrinsic < LB_EXACT_TOL)
+        iv[lb], status[lb] = IV_FLOOR, NR_LB_EXACT
+        err[lb] = np.abs(prices - intrinsic)[lb]
+
+        idx = np.flatnonzero(valid & ~sub & ~lb)
+        args = (prices[idx], spots[idx], strikes[idx], log_sk[idx], sqrt_t[idx],
+                disc[idx], rt[idx], is_call[idx])
+        sigma_c = np.sqrt(np.abs(2.0 / ttes[idx] * -log_sk[idx]))
+        sigma_bs = np.sqrt(2.0 * pi / ttes[idx]) * prices[idx] / spots[idx]
+        start = np.clip(np.maximum(sigma_c, 0.5 * sigma_bs), 0.01, 3.0)
+        v, st, it, e = _newton_iv_vec(*args, start, max_iter, tol)
+
+        # Retry failures once from the Brenner-Subrahmanyam ATM approximation
+        retry = np.flatnonzero(st != NR_CONVERGED)
+        if retry.size:
+            v2, st2, it2, e2 = _newton_iv_vec(
+                *(a[retry] for a in args), np.clip(sigma_bs[retry], 0.01, 3.0), max_iter, tol)
+            it[retry] += it2
+            better = (st2 == NR_CONVERGED) | (e2 < e[retry])
+            sel = retry[better]
+            v[sel], st[sel], e[sel] = v2[better], st2[better], e2[better]
+
+        iv[idx], status[idx], iters[idx], err[idx] = v, st, it, e
+
+    return iv, status, iters, err
+
+
+def _newton_raphson_iv(target: float, spot: float, strike: float,
+                       tte: float, is_call: int, r: float,
+                       max_iter: int = 50, tol: float = 1e-8) -> IVResult:
+    """Newton-Raphson from the sigma_c inflection start (compiled loop)."""
+    vol, status, iters, diff = _newton_iv_nb(
+        target, spot, strike, tte, bool(is_call), r, max_iter, tol
+    )
+    return IVResult(vol, status == NR_CONVERGED, iters, _NR_METHODS[status], diff)
 
 
 def _brent_iv(target: float, spot: float, strike: float,
-              tte: float, ot: str, r: float) -> IVResult:
+              tte: float, is_call: int, r: float) -> IVResult:
     """Brent's method — guaranteed convergence within bracket."""
     def obj(vol):
-        return bs_price(spot, strike, tte, vol, ot, r) - target
+        return _bs_price(spot, strike, tte, vol, is_call, r) - target
 
     try:
-        lo, hi = 0.001, 5.0
+        # hi=3.0 brackets nearly every listed option on the first try
+        lo, hi = IV_FLOOR, 3.0
         f_lo, f_hi = obj(lo), obj(hi)
         if f_lo * f_hi > 0:
-            for test_hi in [1.0, 2.0, 5.0, 10.0]:
-                if obj(lo) * obj(test_hi) < 0:
-                    hi = test_hi
+            for test_hi in (5.0, 10.0):
+                f_test = obj(test_hi)
+                if f_lo * f_test < 0:
+                    hi, f_hi = test_hi, f_test
                     break
             else:
                 best = lo if abs(f_lo) < abs(f_hi) else hi
@@ -188,7 +451,8 @@ def _brent_iv(target: float, spot: float, strike: float,
                                 min(abs(f_lo), abs(f_hi)))
 
         iv, info = brentq(obj, lo, hi, xtol=1e-8, maxiter=100, full_output=True)
-        return IVResult(iv, info.converged, info.iterations, "brent", abs(obj(iv)))
+        err = abs(_bs_price(spot, strike, tte, iv, is_call, r) - target)
+        return IVResult(iv, info.converged, info.iterations, "brent", err)
     except (ValueError, RuntimeError) as e:
         log.debug(f"Brent failed: {e}")
         return IVResult(0.20, False, 0, "brent_failed", float('inf'))
@@ -199,44 +463,60 @@ def _brent_iv(target: float, spot: float, strike: float,
 # ═══════════════════════════════════════════════════════════════
 
 def calculate_portfolio_greeks_from_df(positions_df) -> Dict[str, float]:
-    """Sum Greeks columns in a DataFrame."""
-    import pandas as pd
-    if positions_df is None or positions_df.empty:
-        return {'delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0, 'rho': 0}
-    result = {}
-    for g in ('delta', 'gamma', 'theta', 'vega', 'rho'):
-        if g in positions_df.columns and 'quantity' in positions_df.columns:
-            result[g] = float((positions_df[g] * positions_df['quantity']).sum())
-        else:
-            result[g] = 0.0
+    """Quantity-weighted sum of Greeks columns (one gemv over all columns)."""
+    greeks = ('delta', 'gamma', 'theta', 'vega', 'rho')
+    result = dict.fromkeys(greeks, 0.0)
+    if positions_df is None or positions_df.empty or 'quantity' not in positions_df.columns:
+        return result
+    present = [g for g in greeks if g in positions_df.columns]
+    if present:
+        mat = positions_df[present].to_numpy(dtype=np.float64)
+        qty = positions_df['quantity'].to_numpy(dtype=np.float64)
+        # NaN legs contribute 0, matching the pandas Series.sum() skipna total
+        result.update(zip(present, (np.nan_to_num(mat).T @ np.nan_to_num(qty)).tolist()))
     return result
 
 
 def calculate_strategy_payoff(positions_df, spot_range) -> 'pd.DataFrame':
-    """Payoff at expiry for multi-leg strategy."""
+    """
+    Payoff at expiry for multi-leg strategy (legs × spots in one NumPy pass).
+    Only the intrinsic-value matrix is stored in float32; S - K and the
+    quantity/premium arithmetic run in float64. float32 keeps ~7 significant
+    digits of intrinsic, so a leg is off by at most qty × intrinsic × 6e-8
+    (≈ ₹0.2 on 1800-qty NIFTY legs 1000+ points ITM).
+    """
     import pandas as pd
-    payoffs = pd.DataFrame({'spot': spot_range, 'payoff': 0.0})
-    for _, pos in positions_df.iterrows():
-        strike = pos.get('strike', 0)
-        ot = pos.get('option_type', 'CE')
-        qty = pos.get('quantity', 0)
-        entry = pos.get('entry_price', 0)
-        pt = pos.get('position_type', 'long')
-        if ot == 'CE':
-            intrinsic = np.maximum(spot_range - strike, 0)
-        else:
-            intrinsic = np.maximum(strike - spot_range, 0)
-        if pt == 'short':
-            payoffs['payoff'] += (entry - intrinsic) * qty
-        else:
-            payoffs['payoff'] += (intrinsic - entry) * qty
-    return payoffs
+    spot = np.asarray(spot_range, dtype=np.float64)
+    n = len(positions_df)
+
+    def col(name, default):
+        if name in positions_df.columns:
+            return positions_df[name].to_numpy()
+        return np.full(n, default)
+
+    strikes = col('strike', 0).astype(np.float64)[:, None]
+    qty = col('quantity', 0).astype(np.float64)[:, None]
+    entry = col('entry_price', 0).astype(np.float64)[:, None]
+    # +1 for CE, -1 for PE: intrinsic = max(sign_ce·(S-K), 0), no per-leg select
+    sign_ce = (2 * (col('option_type', 'CE') == 'CE').astype(np.float64) - 1)[:, None]
+    sign = np.where(col('position_type', 'long') == 'short', -1.0, 1.0)[:, None]
+
+    intrinsic = np.maximum(sign_ce * (spot[None, :] - strikes), 0.0).astype(np.float32)
+    payoff = (sign * qty * (intrinsic - entry)).sum(axis=0)
+    return pd.DataFrame({'spot': np.asarray(spot_range), 'payoff': payoff})
 
 
 def calculate_var(returns, confidence=0.95) -> float:
+    """Historical VaR. O(n) partition select; interpolated quantile for short series."""
     if returns is None or len(returns) == 0:
         return 0.0
-    return float(np.percentile(returns, (1 - confidence) * 100))
+    arr = np.asarray(returns, dtype=float)
+    if len(arr) < 256:
+        return float(np.quantile(arr, 1 - confidence))
+    k = int((1 - confidence) * len(arr))
+    if k <= 0:
+        return float(arr.min())
+    return float(np.partition(arr, k)[k])
 
 
 def calculate_sharpe(returns, risk_free=C.RISK_FREE_RATE) -> float:
@@ -5,24 +5,28 @@ Fixes: UnboundLocalError in sidebar, retry logic, real spot prices,
 """
 
 import streamlit as st
+import altair as alt
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from datetime import datetime, timedelta, date
 from functools import wraps
-import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import html
 import logging
 from typing import Dict, List, Optional
 
 import app_config as C
 from helpers import (
-    APIResponse, safe_int, safe_float, safe_str, parse_funds,
-    detect_position_type, get_closing_action, calculate_pnl,
+    response_data, response_items, safe_int, safe_float, safe_str, parse_funds,
+    numeric_column, lower_column, detect_position_types, normalize_positions,
     process_option_chain, create_pivot_table,
     calculate_pcr, calculate_max_pain, estimate_atm_strike,
-    add_greeks_to_chain, get_market_status, format_currency,
-    format_expiry, calculate_days_to_expiry
+    add_greeks_to_chain, instruments_table, get_market_status, format_currency,
+    format_expiry, expiry_to_iso, calculate_days_to_expiry
 )
-from analytics import calculate_greeks, estimate_implied_volatility
+from analytics import calculate_greeks_vec, estimate_implied_volatility
 from session_manager import (
     Credentials, SessionState, CacheManager, Notifications
 )
@@ -55,7 +59,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""<style>
+# Built once at module scope. It is emitted on every run on purpose:
+# Streamlit removes elements a rerun does not re-emit, so a one-shot
+# session guard would drop the styles after the first interaction.
+_CSS = """<style>
 .page-header {font-size: 2rem; font-weight: 700; color: #1f77b4; border-bottom: 4px solid #1f77b4; padding-bottom: 0.5rem; margin-bottom: 1.5rem;}
 .section-header {font-size: 1.5rem; font-weight: 600; color: #2c3e50; margin: 1.5rem 0 1rem;}
 .status-connected {background: #d4edda; color: #155724; padding: 6px 14px; border-radius: 16px; font-weight: 600; display: inline-block;}
@@ -66,10 +73,15 @@ st.markdown("""<style>
 .metric-card {background: #f8f9fa; padding: 1.25rem; border-radius: 8px; border: 1px solid #dee2e6;}
 .empty-state {text-align: center; padding: 3rem 1rem; color: #6c757d;}
 .empty-state-icon {font-size: 4rem; margin-bottom: 1rem; opacity: 0.5;}
+.tiny-table {border-collapse: collapse; width: 100%; font-size: 0.9rem;}
+.tiny-table th, .tiny-table td {padding: 6px 10px; border-bottom: 1px solid #dee2e6; text-align: left;}
+.tiny-table th {background: #f8f9fa; font-weight: 600;}
 #MainMenu {visibility: hidden}
 footer {visibility: hidden}
 header {visibility: hidden}
-</style>""", unsafe_allow_html=True)
+</style>"""
+
+st.markdown(_CSS, unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -90,7 +102,7 @@ ICONS = {
     "Risk Monitor": "🛡️"
 }
 
-AUTH_PAGES = set(PAGES[1:])
+AUTH_PAGES = frozenset(PAGES[1:])
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -105,7 +117,7 @@ def error_handler(f):
         except Exception as e:
             log.error(f"{f.__name__}: {e}", exc_info=True)
             st.error(f"❌ {e}")
-            if st.session_state.get("debug_mode"):
+            if is_debug():
                 st.exception(e)
     return w
 
@@ -113,7 +125,7 @@ def error_handler(f):
 def require_auth(f):
     @wraps(f)
     def w(*a, **k):
-        if not SessionState.is_authenticated():
+        if not is_authenticated():
             st.warning("🔒 Please login")
             return
         return f(*a, **k)
@@ -133,23 +145,114 @@ def empty_state(icon, msg, sub=""):
     )
 
 
+def tiny_table(rows):
+    """Render a few dict rows as a static HTML table (no DataFrame/Arrow)."""
+    cols = list(rows[0])
+    head = "".join(f"<th>{html.escape(str(c))}</th>" for c in cols)
+    body = "".join(
+        "<tr>" + "".join(
+            f"<td>{html.escape(str(r.get(c, '')))}</td>" for c in cols
+        ) + "</tr>"
+        for r in rows
+    )
+    st.markdown(
+        f'<table class="tiny-table"><thead><tr>{head}</tr></thead>'
+        f'<tbody>{body}</tbody></table>',
+        unsafe_allow_html=True
+    )
+
+
+def show_table(rows):
+    """st.dataframe for real tables, tiny_table for a handful of rows."""
+    if 0 < len(rows) <= C.SMALL_TABLE_THRESHOLD:
+        tiny_table(rows)
+    else:
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+
+def page_selector(total, key, page_size=C.TABLE_PAGE_SIZE):
+    """Page picker for long tables; returns the row offset to render from."""
+    pages = max(1, -(-total // page_size))
+    if pages == 1:
+        return 0
+    page = st.number_input(
+        f"Page (1–{pages}, {total} rows)", min_value=1, max_value=pages,
+        value=1, step=1, key=key
+    )
+    return (int(page) - 1) * page_size
+
+
+def paged_dataframe(items, key, page_size=C.TABLE_PAGE_SIZE, **kwargs):
+    """st.dataframe over one page of items, so only that slice is serialized."""
+    start = page_selector(len(items), key, page_size)
+    st.dataframe(
+        pd.DataFrame(items[start:start + page_size]),
+        hide_index=True, **kwargs
+    )
+
+
+# Values resolved once per script run: the sidebar and the page both ask
+# for the client and funds. Cleared at the top of main() and whenever an
+# order invalidates the trading caches.
+_run_memo: Dict[str, object] = {}
+
+
+def is_authenticated():
+    """SessionState.is_authenticated(), read once per script run."""
+    if "auth" not in _run_memo:
+        _run_memo["auth"] = SessionState.is_authenticated()
+    return _run_memo["auth"]
+
+
+def is_debug():
+    if "debug" not in _run_memo:
+        _run_memo["debug"] = bool(st.session_state.get("debug_mode"))
+    return _run_memo["debug"]
+
+
+def set_authentication(auth, client=None):
+    SessionState.set_authentication(auth, client)
+    _run_memo.clear()
+
+
 def get_client():
+    c = _run_memo.get("client")
+    if c is not None:
+        return c
     c = SessionState.get_client()
     if not c or not c.is_connected():
         st.error("❌ Not connected")
         return None
+    _run_memo["client"] = c
     return c
 
 
+def _store_funds(resp):
+    funds = parse_funds(resp)
+    CacheManager.set("funds", funds, "funds", C.FUNDS_CACHE_TTL_SECONDS)
+    _run_memo["funds"] = funds
+    return funds
+
+
+def _store_positions(resp):
+    items = normalize_positions(response_items(resp))
+    CacheManager.set(
+        "positions", items, "positions",
+        C.POSITION_CACHE_TTL_SECONDS
+    )
+    return items
+
+
 def get_cached_funds(client):
+    if "funds" in _run_memo:
+        return _run_memo["funds"]
     cached = CacheManager.get("funds", "funds")
     if cached:
+        _run_memo["funds"] = cached
         return cached
     resp = client.get_funds()
     if resp["success"]:
-        funds = parse_funds(resp)
-        CacheManager.set("funds", funds, "funds", C.FUNDS_CACHE_TTL_SECONDS)
-        return funds
+        return _store_funds(resp)
     return None
 
 
@@ -159,76 +262,254 @@ def get_cached_positions(client):
         return cached
     resp = client.get_positions()
     if resp["success"]:
-        items = APIResponse(resp).items
-        CacheManager.set(
-            "positions", items, "positions",
-            C.POSITION_CACHE_TTL_SECONDS
-        )
-        return items
+        return _store_positions(resp)
     return None
 
 
+def prefetch_account(client):
+    """
+    When funds and positions both miss, fetch them concurrently so a cold
+    dashboard waits for one round-trip instead of two. Results land in the
+    caches; get_cached_funds / get_cached_positions then return instantly.
+    """
+    misses = {}
+    if "funds" not in _run_memo and not CacheManager.get("funds", "funds"):
+        misses["funds"] = (client.get_funds, _store_funds)
+    if CacheManager.get("positions", "positions") is None:
+        misses["positions"] = (client.get_positions, _store_positions)
+    if len(misses) < 2:
+        return
+
+    # Only the network calls run in the pool; cache writes stay on the
+    # script thread (workers have no Streamlit context).
+    with ThreadPoolExecutor(max_workers=len(misses)) as pool:
+        futures = {
+            name: (pool.submit(fetch), store)
+            for name, (fetch, store) in misses.items()
+        }
+    for name, (fut, store) in futures.items():
+        try:
+            resp = fut.result()
+            if resp["success"]:
+                store(resp)
+        except Exception as e:
+            log.warning(f"Prefetch {name} failed: {e}")
+
+
+# st.cache_data hashes the argument contents, so a view toggle or a rerun
+# over the same chain reuses the reshaped frame instead of rebuilding it.
+@st.cache_data(ttl=C.OC_CACHE_TTL_SECONDS, show_spinner=False, max_entries=32)
+def build_chain_frame(data):
+    return process_option_chain(data)
+
+
+@st.cache_data(ttl=C.OC_CACHE_TTL_SECONDS, show_spinner=False, max_entries=32)
+def build_chain_pivot(ddf):
+    return create_pivot_table(ddf)
+
+
+@st.cache_data(ttl=60, show_spinner=False, max_entries=32)
+def oi_chart(strikes, call_oi, put_oi):
+    """Stacked Call/Put OI bars; the spec is rebuilt only when the slice changes."""
+    n = len(strikes)
+    long = pd.DataFrame({
+        "strike_price": strikes * 2,
+        "OI": call_oi + put_oi,
+        "Side": ["Call OI"] * n + ["Put OI"] * n,
+    })
+    return alt.Chart(long).mark_bar().encode(
+        x=alt.X("strike_price:O", title="Strike"),
+        y=alt.Y("OI:Q", title="Open Interest"),
+        color=alt.Color("Side:N", title=None),
+        tooltip=["strike_price", "Side", "OI"],
+    )
+
+
 def split_positions(all_pos):
-    options, equities = [], []
-    for p in (all_pos or []):
-        qty = safe_int(p.get("quantity", 0))
-        if qty == 0:
-            continue
-        if C.is_option_position(p):
-            options.append(p)
-        elif C.is_equity_position(p):
-            equities.append(p)
+    """Non-zero positions split into (options, equities); classified column-wise."""
+    if not all_pos:
+        return [], []
+    df = pd.DataFrame(all_pos)
+    active = numeric_column(df, "quantity").astype(int).to_numpy() != 0
+    product = lower_column(df, "product_type")
+    segment = lower_column(df, "segment")
+    has_right = df["right"].notna() if "right" in df.columns else False
+    is_opt = product.isin(C.OPTION_PRODUCT_TYPES) | (segment.eq("fno") & has_right)
+    is_eq = ~is_opt & (segment.eq("equity") | product.isin(C.EQUITY_PRODUCT_TYPES))
+    # Index back into the original dicts so callers keep their exact keys
+    options = [all_pos[i] for i in np.flatnonzero(active & is_opt.to_numpy())]
+    equities = [all_pos[i] for i in np.flatnonzero(active & is_eq.to_numpy())]
     return options, equities
 
 
-def invalidate_trading_caches():
+def get_cached_list(kind, fetch, *args, **kwargs):
+    """
+    Order/trade list responses, cached per session for
+    ORDERS_CACHE_TTL_SECONDS keyed on the request arguments, so tab
+    switches and widget reruns do not repeat the remote call.
+    """
+    key = f"{kind}_{args}_{sorted(kwargs.items())}"
+    cached = CacheManager.get(key, "orders")
+    if cached is not None:
+        return cached
+    r = fetch(*args, **kwargs)
+    if r["success"]:
+        CacheManager.set(key, r, "orders", C.ORDERS_CACHE_TTL_SECONDS)
+    return r
+
+
+# The two tables below skip hashing their row lists (leading underscore) and
+# key on a cheap fingerprint instead. The alert fingerprint includes the
+# session's monitor id, so one session never sees another's alerts.
+# They are cached as Arrow tables, the form st.dataframe sends to the
+# browser, so a cache hit skips the DataFrame → Arrow conversion too.
+@st.cache_data(ttl=30, show_spinner=False, max_entries=4)
+def alert_history_table(fingerprint, _history):
+    return pa.table({
+        "Time": [a.timestamp for a in _history],
+        "Level": [a.level for a in _history],
+        "Category": [a.category for a in _history],
+        "Message": [a.message for a in _history],
+        "Position": [a.position_id for a in _history],
+    })
+
+
+# Activity-log actions written by the risk monitor
+RISK_ACTION_PREFIXES = ("STOP_", "TRAIL_", "MONITOR_")
+
+
+@st.cache_data(ttl=30, show_spinner=False, max_entries=4)
+def risk_activity_table(row_ids, _rows):
+    """Persisted risk-monitor activity; row_ids identifies the DB rows."""
+    return pa.Table.from_pylist(_rows)
+
+
+@st.cache_data(ttl=5, show_spinner=False, max_entries=32)
+def option_position_frame(opt_pos):
+    """
+    Option legs as columns: display fields, side, unsigned qty, avg/LTP,
+    P&L and closing action, computed column-wise. Row i is opt_pos[i].
+    Cached on the content of opt_pos, so reruns that leave positions
+    unchanged (tab switches, widget changes) skip the rebuild.
+    """
+    df = pd.DataFrame(opt_pos)
+    pt = detect_position_types(df)
+    short = pt == "short"
+    qty = df["abs_qty"].astype(int)
+    avg = numeric_column(df, "average_price")
+    ltp = numeric_column(df, "ltp", np.nan).fillna(avg)
+    blank = pd.Series("", index=df.index)
+    stock = df.get("stock_code", blank).fillna("")
+    return pd.DataFrame({
+        "stock": stock,
+        "inst": stock.map(C.api_code_to_display),
+        "strike": df.get("strike_price"),
+        "strike_px": numeric_column(df, "strike_price"),
+        "type": df.get("right", blank).fillna("").map(C.normalize_option_type),
+        "expiry": df.get("expiry_date", blank).fillna(""),
+        "pt": pt,
+        "qty": qty,
+        "avg": avg,
+        "ltp": ltp,
+        "quote": numeric_column(df, "ltp"),
+        "pnl": pd.Series(np.where(short, avg - ltp, ltp - avg), index=df.index) * qty,
+        "close": np.where(short, "buy", "sell"),
+    }, index=df.index)
+
+
+def equity_position_table(eq_pos):
+    """Display table and total P&L for equity positions, built column-wise."""
+    df = pd.DataFrame(eq_pos)
+    pnl = numeric_column(df, "pnl")
+    blank = pd.Series("", index=df.index)
+    table = pd.DataFrame({
+        "Stock": df.get("stock_code", blank).fillna(""),
+        "Qty": numeric_column(df, "quantity").astype(int),
+        "Avg": numeric_column(df, "average_price").map("₹{:.2f}".format),
+        "LTP": numeric_column(df, "ltp").map("₹{:.2f}".format),
+        "P&L": pnl.map("₹{:+,.2f}".format),
+        "Type": df.get("product_type", blank).fillna(""),
+    })
+    return table, float(pnl.sum())
+
+
+def option_chain_cache_key(api_code, expiry):
+    return f"oc_{api_code}_{expiry_to_iso(expiry)}"
+
+
+def invalidate_trading_caches(api_code="", expiry=""):
+    """Drop caches an order can change; pass the contract to also drop its chain."""
     CacheManager.invalidate("positions", "positions")
     CacheManager.invalidate("funds", "funds")
+    CacheManager.clear_all("orders")
+    _run_memo.pop("funds", None)
+    if api_code and expiry:
+        CacheManager.invalidate(option_chain_cache_key(api_code, expiry), "option_chain")
 
 
-def fetch_spot_prices(client, positions):
-    stock_codes = set()
-    for p in positions:
-        if C.is_option_position(p):
-            stock_codes.add(p.get("stock_code", ""))
+def fetch_spot_prices(client, opt_pos):
+    """Spot price per underlying of opt_pos (option positions, as split_positions returns)."""
+    stock_codes = {p.get("stock_code", "") for p in opt_pos}
 
     spot_prices = {}
+    misses = []
     for code in stock_codes:
         if not code:
             continue
-        ck = f"spot_{code}"
-        cached = CacheManager.get(ck, "spot")
+        cached = CacheManager.get(f"spot_{code}", "spot")
         if cached:
             spot_prices[code] = cached
             continue
 
-        cfg = None
-        for n, c in C.INSTRUMENTS.items():
-            if c.api_code == code:
-                cfg = c
-                break
-        if not cfg:
-            continue
-
-        try:
-            resp = client.get_spot_price(code, cfg.exchange)
-            if resp["success"]:
-                items = APIResponse(resp).items
-                if items:
-                    ltp = safe_float(items[0].get("ltp", 0))
-                    if ltp > 0:
-                        spot_prices[code] = ltp
-                        CacheManager.set(
-                            ck, ltp, "spot",
-                            C.SPOT_CACHE_TTL_SECONDS
-                        )
-        except Exception:
-            pass
+        cfg = C.get_instrument_by_api_code(code)
+        if cfg:
+            misses.append((code, cfg))
+
+    if not misses:
+        return spot_prices
+
+    # Network calls overlap in the pool; parsing and session_state writes
+    # stay on the script thread (workers have no Streamlit context).
+    with ThreadPoolExecutor(max_workers=min(8, len(misses))) as pool:
+        futures = {
+            pool.submit(client.get_spot_price, code, cfg.exchange): code
+            for code, cfg in misses
+        }
+        for fut in as_completed(futures):
+            code = futures[fut]
+            try:
+                resp = fut.result()
+                if resp["success"]:
+                    items = response_items(resp)
+                    if items:
+                        ltp = safe_float(items[0].get("ltp", 0))
+                        if ltp > 0:
+                            spot_prices[code] = ltp
+                            CacheManager.set(
+                                f"spot_{code}", ltp, "spot",
+                                C.SPOT_CACHE_TTL_SECONDS
+                            )
+            except Exception:
+                pass
     return spot_prices
 
 
-def render_alert_banner():
+def get_risk_monitor(client=None) -> Optional[RiskMonitor]:
+    """
+    This session's RiskMonitor, created on first use when a client is given.
+    Held in session_state rather than st.cache_resource: it carries this
+    user's client and monitored positions, and a cache_resource object is
+    shared by every session in the process.
+    """
     monitor = st.session_state.get("risk_monitor")
+    if monitor is None and client is not None:
+        monitor = RiskMonitor(api_client=client, poll_interval=15.0)
+        st.session_state.risk_monitor = monitor
+    return monitor
+
+
+def render_alert_banner():
+    monitor = get_risk_monitor()
     if not monitor or not monitor.is_running():
         return
     for alert in monitor.get_alerts():
@@ -252,7 +533,7 @@ def render_sidebar():
         # Check secrets availability immediately at top level scope
         has_secrets = Credentials.has_stored_credentials()
 
-        avail = PAGES if SessionState.is_authenticated() else ["Dashboard"]
+        avail = PAGES if is_authenticated() else ["Dashboard"]
         cur = SessionState.get_current_page()
         if cur not in avail:
             cur = "Dashboard"
@@ -274,7 +555,7 @@ def render_sidebar():
 
         st.markdown("---")
 
-        if SessionState.is_authenticated():
+        if is_authenticated():
             st.markdown(
                 '<span class="status-connected">✅ Connected</span>',
                 unsafe_allow_html=True
@@ -303,12 +584,19 @@ def render_sidebar():
                         format_currency(funds["unallocated"])
                     )
 
+            with st.expander("📊 Cache stats"):
+                stats = CacheManager.get_stats()
+                if stats:
+                    st.dataframe(pd.DataFrame(stats).T)
+                else:
+                    st.caption("No cache activity yet")
+
             st.markdown("---")
             if st.button("🔓 Disconnect"):
-                monitor = st.session_state.get("risk_monitor")
+                monitor = get_risk_monitor()
                 if monitor:
                     monitor.stop()
-                SessionState.set_authentication(False, None)
+                set_authentication(False, None)
                 Credentials.clear_runtime_credentials()
                 CacheManager.clear_all()
                 SessionState.navigate_to("Dashboard")
@@ -356,6 +644,7 @@ def render_sidebar():
                 "Debug",
                 value=st.session_state.get("debug_mode", False)
             )
+            _run_memo["debug"] = st.session_state.debug_mode
             
             # DEBUGGER: Show loaded keys status (safe)
             if has_secrets:
@@ -379,29 +668,27 @@ def do_login(api_key, api_secret, token):
                 Credentials.save_runtime_credentials(
                     api_key, api_secret, token
                 )
-                SessionState.set_authentication(True, client)
+                set_authentication(True, client)
                 st.session_state.user_name = "Trader"
                 SessionState.log_activity("Login", "Connected")
                 _db.log_activity("LOGIN", "Session started")
 
-                monitor = RiskMonitor(
-                    api_client=client, poll_interval=15.0
-                )
-                st.session_state.risk_monitor = monitor
+                # A new login gets a fresh monitor bound to the new client
+                st.session_state.pop("risk_monitor", None)
+                get_risk_monitor(client)
 
                 Notifications.success("Connected!")
-                time.sleep(0.5)
                 st.rerun()
             else:
                 st.error(f"❌ Connection Failed: {resp.get('message', 'Unknown error')}")
                 if 'session' in resp.get('message', '').lower():
                     st.info("💡 Hint: Session tokens expire daily. Login to ICICI Breeze to get a new one.")
                 
-                if st.session_state.get("debug_mode"):
+                if is_debug():
                     st.json(resp)
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
-            if st.session_state.get("debug_mode"):
+            if is_debug():
                 st.exception(e)
 
 
@@ -416,7 +703,7 @@ def page_dashboard():
         unsafe_allow_html=True
     )
 
-    if not SessionState.is_authenticated():
+    if not is_authenticated():
         st.markdown("### Welcome to Breeze Options Trader")
         c1, c2, c3 = st.columns(3)
         with c1:
@@ -426,15 +713,7 @@ def page_dashboard():
         with c3:
             st.markdown("🛡️ **Risk** — P&L, margin, stop-loss alerts")
         st.markdown("---")
-        data = [
-            {
-                "Name": n, "Desc": c.description,
-                "Exchange": c.exchange, "Lot": c.lot_size,
-                "Gap": c.strike_gap
-            }
-            for n, c in C.INSTRUMENTS.items()
-        ]
-        st.dataframe(pd.DataFrame(data), hide_index=True)
+        st.dataframe(instruments_table(), hide_index=True)
         st.info("👈 Login to start")
         return
 
@@ -482,31 +761,25 @@ def page_dashboard():
                 SessionState.navigate_to("Sell Options")
                 st.rerun()
         else:
-            total_pnl = 0.0
-            rows = []
-            for p in opt_pos:
-                qty = safe_int(p.get("quantity", 0))
-                pt = detect_position_type(p)
-                avg = safe_float(p.get("average_price", 0))
-                ltp = safe_float(p.get("ltp", avg))
-                pnl = calculate_pnl(pt, avg, ltp, abs(qty))
-                total_pnl += pnl
-                rows.append({
-                    "Instrument": C.api_code_to_display(
-                        p.get("stock_code", "")
-                    ),
-                    "Strike": p.get("strike_price"),
-                    "Type": C.normalize_option_type(p.get("right", "")),
-                    "Pos": pt.upper(),
-                    "Qty": abs(qty),
-                    "Avg": f"₹{avg:.2f}",
-                    "LTP": f"₹{ltp:.2f}",
-                    "P&L": f"₹{pnl:+,.2f}"
-                })
-            if rows:
+            pf = option_position_frame(opt_pos)
+            total_pnl = float(pf["pnl"].sum())
+            table = pd.DataFrame({
+                "Instrument": pf["inst"],
+                "Strike": pf["strike"],
+                "Type": pf["type"],
+                "Pos": pf["pt"].str.upper(),
+                "Qty": pf["qty"],
+                "Avg": pf["avg"].map("₹{:.2f}".format),
+                "LTP": pf["ltp"].map("₹{:.2f}".format),
+                "P&L": pf["pnl"].map("₹{:+,.2f}".format),
+            })
+            if not table.empty:
                 c1, c2 = st.columns([3, 1])
                 with c1:
-                    st.dataframe(pd.DataFrame(rows), hide_index=True)
+                    if len(table) <= C.SMALL_TABLE_THRESHOLD:
+                        tiny_table(table.to_dict("records"))
+                    else:
+                        st.dataframe(table, hide_index=True)
                 with c2:
                     cl = "profit" if total_pnl >= 0 else "loss"
                     st.markdown(
@@ -521,21 +794,11 @@ def page_dashboard():
         if not eq_pos:
             empty_state("📦", "No equity positions")
         else:
-            eq_rows = []
-            for p in eq_pos:
-                pnl_val = safe_float(p.get("pnl", 0))
-                eq_rows.append({
-                    "Stock": p.get("stock_code", ""),
-                    "Qty": safe_int(p.get("quantity", 0)),
-                    "Avg": f"₹{safe_float(p.get('average_price', 0)):.2f}",
-                    "LTP": f"₹{safe_float(p.get('ltp', 0)):.2f}",
-                    "P&L": f"₹{pnl_val:+,.2f}",
-                    "Type": p.get("product_type", "")
-                })
-            st.dataframe(pd.DataFrame(eq_rows), hide_index=True)
-            total_eq = sum(
-                safe_float(p.get("pnl", 0)) for p in eq_pos
-            )
+            eq_table, total_eq = equity_position_table(eq_pos)
+            if len(eq_table) <= C.SMALL_TABLE_THRESHOLD:
+                tiny_table(eq_table.to_dict("records"))
+            else:
+                st.dataframe(eq_table, hide_index=True)
             st.metric("Total Equity P&L", format_currency(total_eq))
 
     # ── Quick Actions ─────────────────────────────────────
@@ -623,7 +886,12 @@ def page_option_chain():
     with c3:
         show_greeks = st.checkbox("Greeks", True, key="oc_g")
 
-    ck = f"oc_{cfg.api_code}_{expiry}"
+    ck = option_chain_cache_key(cfg.api_code, expiry)
+    # Positions the risk monitor tracks changed since this page last ran
+    monitor = get_risk_monitor()
+    if monitor and st.session_state.get("_oc_pos_version") != monitor.positions_version:
+        st.session_state._oc_pos_version = monitor.positions_version
+        CacheManager.clear_all("option_chain")
     if refresh:
         CacheManager.invalidate(ck, "option_chain")
         st.rerun()
@@ -639,7 +907,7 @@ def page_option_chain():
         if not resp["success"]:
             st.error(f"❌ {resp.get('message')}")
             return
-        df = process_option_chain(resp.get("data", {}))
+        df = build_chain_frame(resp.get("data", {}))
         if df.empty:
             st.warning("No data returned")
             return
@@ -662,12 +930,13 @@ def page_option_chain():
 
     # Filter around ATM
     if "strike_price" in df.columns and atm > 0:
-        strikes = sorted(df["strike_price"].unique())
-        if strikes:
-            ai = min(
-                range(len(strikes)),
-                key=lambda i: abs(strikes[i] - atm)
-            )
+        strikes = np.unique(df["strike_price"].to_numpy())
+        if strikes.size:
+            # Strikes are sorted: binary search, then take the nearer neighbour
+            i = int(np.searchsorted(strikes, atm))
+            ai = i if i < len(strikes) and (
+                i == 0 or strikes[i] - atm < atm - strikes[i - 1]
+            ) else i - 1
             start = max(0, ai - n_strikes)
             end = min(len(strikes), ai + n_strikes + 1)
             filt = strikes[start:end]
@@ -689,7 +958,7 @@ def page_option_chain():
             pass
 
     if view == "Traditional":
-        pv = create_pivot_table(ddf)
+        pv = build_chain_pivot(ddf)
         if not pv.empty:
             st.dataframe(pv, height=600, hide_index=True)
         else:
@@ -714,19 +983,23 @@ def page_option_chain():
         st.markdown("---")
         st.markdown("### Open Interest")
         try:
-            co = ddf[ddf["right"] == "Call"][
-                ["strike_price", "open_interest"]
-            ].rename(columns={"open_interest": "Call OI"})
-            po = ddf[ddf["right"] == "Put"][
-                ["strike_price", "open_interest"]
-            ].rename(columns={"open_interest": "Put OI"})
             oi = (
-                pd.merge(co, po, on="strike_price", how="outer")
-                .fillna(0)
-                .sort_values("strike_price")
-                .set_index("strike_price")
+                ddf.pivot_table(
+                    index="strike_price", columns="right",
+                    values="open_interest", aggfunc="sum", fill_value=0
+                )
+                .reindex(columns=["Call", "Put"], fill_value=0)
+                .rename(columns={"Call": "Call OI", "Put": "Put OI"})
+                .sort_index()
+            )
+            st.altair_chart(
+                oi_chart(
+                    tuple(oi.index.tolist()),
+                    tuple(oi["Call OI"].tolist()),
+                    tuple(oi["Put OI"].tolist()),
+                ),
+                use_container_width=True
             )
-            st.bar_chart(oi)
         except Exception:
             pass
 
@@ -804,7 +1077,7 @@ def page_sell_options():
                     expiry, int(strike), oc
                 )
                 if r["success"]:
-                    items = APIResponse(r).items
+                    items = response_items(r)
                     if items:
                         q_ltp = safe_float(items[0].get("ltp", 0))
                         st.success(f"LTP: ₹{q_ltp:.2f}")
@@ -825,7 +1098,7 @@ def page_sell_options():
                 )
                 if r["success"]:
                     m = safe_float(
-                        APIResponse(r).get("required_margin", 0)
+                        response_data(r).get("required_margin", 0)
                     )
                     st.success(
                         f"Required Margin: {format_currency(m)}"
@@ -876,9 +1149,9 @@ def page_sell_options():
                     )
 
                 if r["success"]:
-                    order_id = APIResponse(r).get("order_id", "?")
-                    st.success(f"✅ Order placed! ID: {order_id}")
-                    st.balloons()
+                    order_id = response_data(r).get("order_id", "?")
+                    # Toasts survive st.rerun(), so no pause is needed to show it
+                    Notifications.success(f"Order placed! ID: {order_id}")
 
                     _db.log_trade(
                         stock_code=cfg.api_code,
@@ -900,8 +1173,7 @@ def page_sell_options():
                     SessionState.log_activity(
                         "Sell", f"{inst} {int(strike)} {oc}"
                     )
-                    invalidate_trading_caches()
-                    time.sleep(1.5)
+                    invalidate_trading_caches(cfg.api_code, expiry)
                     st.session_state._order_in_progress = False
                     st.rerun()
 
@@ -917,76 +1189,28 @@ def page_sell_options():
 # PAGE: SQUARE OFF
 # ═══════════════════════════════════════════════════════════════
 
+@st.fragment
 @error_handler
-@require_auth
-def page_square_off():
-    st.markdown(
-        '<h1 class="page-header">🔄 Square Off</h1>',
-        unsafe_allow_html=True
-    )
-    client = get_client()
-    if not client:
-        return
-    if st.button("🔄 Refresh Positions"):
-        invalidate_trading_caches()
-        st.rerun()
-
-    all_pos = get_cached_positions(client)
-    if all_pos is None:
-        st.error("❌ Load failed")
-        return
-    opt_pos, _ = split_positions(all_pos)
-
-    enriched = []
-    for p in opt_pos:
-        pt = detect_position_type(p)
-        avg = safe_float(p.get("average_price", 0))
-        ltp = safe_float(p.get("ltp", avg))
-        q = abs(safe_int(p.get("quantity", 0)))
-        pnl = calculate_pnl(pt, avg, ltp, q)
-        enriched.append({
-            **p,
-            "_pt": pt, "_q": q,
-            "_close": get_closing_action(pt),
-            "_pnl": pnl, "_avg": avg, "_ltp": ltp
-        })
-
-    if not enriched:
-        empty_state("📭", "No positions to square off")
-        if st.button("💰 Go to Sell Options"):
-            SessionState.navigate_to("Sell Options")
-            st.rerun()
-        return
-
-    total = sum(e["_pnl"] for e in enriched)
-    st.metric("Total Options P&L", format_currency(total))
-
-    rows = [{
-        "#": i + 1,
-        "Inst": C.api_code_to_display(e.get("stock_code", "")),
-        "Strike": e.get("strike_price"),
-        "Type": C.normalize_option_type(e.get("right", "")),
-        "Pos": e["_pt"].upper(),
-        "Qty": e["_q"],
-        "P&L": f"₹{e['_pnl']:+,.2f}",
-        "Action": e["_close"].upper()
-    } for i, e in enumerate(enriched)]
-    st.dataframe(pd.DataFrame(rows), hide_index=True)
-
-    st.markdown("---")
+def _square_off_form(client, opt_pos, pf):
+    """
+    Square-off controls as a fragment: changing the position, order type,
+    price or quantity reruns only this form, not the positions table above.
+    """
     st.markdown("### Square Off a Position")
 
-    labels = [
-        f"{C.api_code_to_display(e.get('stock_code', ''))} "
-        f"{e.get('strike_price')} "
-        f"{C.normalize_option_type(e.get('right', ''))}"
-        for e in enriched
-    ]
+    labels = (
+        pf["inst"] + " " + pf["strike"].astype(str) + " " + pf["type"]
+    ).tolist()
     si = st.selectbox(
         "Select Position", range(len(labels)),
         format_func=lambda i: labels[i], key="sq_s"
     )
-    sel = enriched[si]
+    row = pf.iloc[si]
+    sel = {
+        **opt_pos[si],
+        "_pt": row["pt"], "_q": int(row["qty"]),
+        "_close": row["close"], "_ltp": float(row["ltp"]),
+    }
 
     ot = st.radio(
         "Order Type", ["Market", "Limit"],
@@ -1022,8 +1246,8 @@ def page_square_off():
                     pr if ot == "Limit" else 0.0
                 )
                 if r["success"]:
-                    st.success("✅ Squared off!")
-                    order_id = APIResponse(r).get("order_id", "?")
+                    Notifications.success("Squared off!")
+                    order_id = response_data(r).get("order_id", "?")
 
                     _db.log_trade(
                         stock_code=sel.get("stock_code", ""),
@@ -1049,7 +1273,7 @@ def page_square_off():
                         "SqOff", str(sel.get("strike_price"))
                     )
 
-                    monitor = st.session_state.get("risk_monitor")
+                    monitor = get_risk_monitor()
                     if monitor:
                         pid = (
                             f"{sel.get('stock_code')}_"
@@ -1058,8 +1282,9 @@ def page_square_off():
                         )
                         monitor.remove_position(pid)
 
-                    invalidate_trading_caches()
-                    time.sleep(1)
+                    invalidate_trading_caches(
+                        sel.get("stock_code", ""), sel.get("expiry_date", "")
+                    )
                     st.session_state._order_in_progress = False
                     st.rerun()
 
@@ -1071,10 +1296,177 @@ def page_square_off():
             st.session_state._order_in_progress = False
 
 
+def _square_off_all(client, opt_pos, pf):
+    """Close every option position at market, submitting the legs concurrently."""
+    legs = [
+        (p, r.pt, int(r.qty), r.close)
+        for p, r in zip(opt_pos, pf.itertuples(index=False))
+        if int(r.qty) > 0
+    ]
+    if not legs or st.session_state.get("_order_in_progress", False):
+        return
+
+    # Same in-flight guard as the single-leg form: the idempotency key
+    # rolls over each minute, so it alone can't stop a repeat click
+    st.session_state._order_in_progress = True
+    try:
+        # Breeze has no batch order endpoint; overlap the per-leg round-trips.
+        # Logging and session_state writes stay on the script thread.
+        results = []
+        with ThreadPoolExecutor(max_workers=min(8, len(legs))) as pool:
+            futures = {
+                pool.submit(
+                    client.square_off,
+                    p.get("stock_code"), p.get("exchange_code"),
+                    p.get("expiry_date"), safe_int(p.get("strike_price")),
+                    C.normalize_option_type(p.get("right", "")),
+                    qty, pt, "market", 0.0
+                ): (p, qty, close)
+                for p, pt, qty, close in legs
+            }
+            for fut in as_completed(futures):
+                p, qty, close = futures[fut]
+                try:
+                    r = fut.result()
+                except Exception as e:
+                    r = {"success": False, "message": str(e)}
+                results.append((p, qty, close, r))
+
+        monitor = get_risk_monitor()
+        failed = []
+        for p, qty, close, r in results:
+            ot = C.normalize_option_type(p.get("right", ""))
+            if not r["success"]:
+                failed.append(
+                    f"{p.get('stock_code')} {p.get('strike_price')} {ot}: "
+                    f"{r.get('message')}"
+                )
+                continue
+            _db.log_trade(
+                stock_code=p.get("stock_code", ""),
+                exchange=p.get("exchange_code", ""),
+                strike=safe_int(p.get("strike_price", 0)),
+                option_type=ot,
+                expiry=p.get("expiry_date", ""),
+                action=close,
+                quantity=qty,
+                price=0.0,
+                order_type="market",
+                trade_id=str(response_data(r).get("order_id", "?")),
+                notes="Square off all"
+            )
+            if monitor:
+                monitor.remove_position(
+                    f"{p.get('stock_code')}_{p.get('strike_price')}_{ot}"
+                )
+
+        done = len(results) - len(failed)
+        _db.log_activity("SQUARE_OFF_ALL", f"{done}/{len(results)} legs closed")
+        SessionState.log_activity("SqOff", f"All ({done}/{len(results)})")
+        invalidate_trading_caches()
+        for contract in {
+            (p.get("stock_code", ""), p.get("expiry_date", ""))
+            for p, _, _, r in results if r["success"]
+        }:
+            invalidate_trading_caches(*contract)
+        if failed:
+            Notifications.error(
+                f"{len(failed)} of {len(results)} square-offs failed: "
+                + "; ".join(failed)
+            )
+        else:
+            Notifications.success(f"Squared off {done} positions")
+        st.rerun()
+    finally:
+        st.session_state._order_in_progress = False
+
+
+@error_handler
+@require_auth
+def page_square_off():
+    st.markdown(
+        '<h1 class="page-header">🔄 Square Off</h1>',
+        unsafe_allow_html=True
+    )
+    client = get_client()
+    if not client:
+        return
+    if st.button("🔄 Refresh Positions"):
+        invalidate_trading_caches()
+        st.rerun()
+
+    all_pos = get_cached_positions(client)
+    if all_pos is None:
+        st.error("❌ Load failed")
+        return
+    opt_pos, _ = split_positions(all_pos)
+
+    if not opt_pos:
+        empty_state("📭", "No positions to square off")
+        if st.button("💰 Go to Sell Options"):
+            SessionState.navigate_to("Sell Options")
+            st.rerun()
+        return
+
+    pf = option_position_frame(opt_pos)
+    st.metric("Total Options P&L", format_currency(float(pf["pnl"].sum())))
+
+    st.dataframe(pd.DataFrame({
+        "#": np.arange(1, len(pf) + 1),
+        "Inst": pf["inst"],
+        "Strike": pf["strike"],
+        "Type": pf["type"],
+        "Pos": pf["pt"].str.upper(),
+        "Qty": pf["qty"],
+        "P&L": pf["pnl"].map("₹{:+,.2f}".format),
+        "Action": pf["close"].str.upper(),
+    }), hide_index=True)
+
+    st.markdown("---")
+    _square_off_form(client, opt_pos, pf)
+
+    st.markdown("---")
+    st.markdown("### Square Off All")
+    confirm = st.checkbox(
+        f"Close all {len(pf)} option positions at market", key="sq_all_ok"
+    )
+    order_in_progress = st.session_state.get("_order_in_progress", False)
+    if st.button(
+        "🔄 Square Off ALL positions",
+        disabled=not confirm or order_in_progress, key="sq_all"
+    ):
+        with st.spinner("Squaring off all positions..."):
+            _square_off_all(client, opt_pos, pf)
+
+
 # ═══════════════════════════════════════════════════════════════
 # PAGE: ORDERS & TRADES
 # ═══════════════════════════════════════════════════════════════
 
+def _merged_activity():
+    """
+    Session activity followed by persisted activity, deduplicated on
+    (time, action) with the first entry winning. Lazy, so the caller's
+    islice stops reading rows (and DB cursor rows) once it has enough.
+    """
+    seen = set()
+    for entry in SessionState.get_activity_log():
+        key = (entry.get("time", ""), entry.get("action", ""))
+        if key not in seen:
+            seen.add(key)
+            yield entry
+    for entry in _db.iter_activities(limit=25):
+        ts = entry.get("timestamp", "")
+        key = (ts[:8], entry.get("action", ""))
+        if key not in seen:
+            seen.add(key)
+            yield {
+                "time": ts[:19],
+                "action": entry.get("action", ""),
+                "detail": entry.get("detail", "")
+            }
+
+
 @error_handler
 @require_auth
 def page_orders_trades():
@@ -1085,6 +1477,8 @@ def page_orders_trades():
     client = get_client()
     if not client:
         return
+    if st.button("🔄 Refresh", key="ot_refresh"):
+        CacheManager.clear_all("orders")
 
     t1, t2, t3, t4 = st.tabs([
         "📋 Orders", "📊 Trades",
@@ -1112,18 +1506,16 @@ def page_orders_trades():
             return
 
         with st.spinner("Loading orders..."):
-            r = client.get_order_list(
+            r = get_cached_list(
+                "orders", client.get_order_list,
                 "" if exch == "All" else exch,
                 fd.strftime("%Y-%m-%d"),
                 td.strftime("%Y-%m-%d")
             )
         if r["success"]:
-            items = APIResponse(r).items
+            items = response_items(r)
             if items:
-                st.dataframe(
-                    pd.DataFrame(items),
-                    height=400, hide_index=True
-                )
+                paged_dataframe(items, "o_page", height=400)
             else:
                 empty_state("📭", "No orders found")
         else:
@@ -1131,58 +1523,33 @@ def page_orders_trades():
 
     with t2:
         with st.spinner("Loading trades..."):
-            r = client.get_trade_list(
+            r = get_cached_list(
+                "trades", client.get_trade_list,
                 from_date=fd.strftime("%Y-%m-%d"),
                 to_date=td.strftime("%Y-%m-%d")
             )
         if r["success"]:
-            items = APIResponse(r).items
+            items = response_items(r)
             if items:
-                st.dataframe(
-                    pd.DataFrame(items),
-                    height=400, hide_index=True
-                )
+                paged_dataframe(items, "t_page", height=400)
             else:
                 empty_state("📭", "No trades found")
         else:
             st.error(f"❌ {r.get('message')}")
 
     with t3:
-        session_log = SessionState.get_activity_log()
-        db_log = _db.get_activities(limit=50)
-        merged = []
-        seen = set()
-        for entry in session_log:
-            key = (
-                f"{entry.get('time', '')}_"
-                f"{entry.get('action', '')}"
-            )
-            if key not in seen:
-                seen.add(key)
-                merged.append(entry)
-        for entry in db_log:
-            key = (
-                f"{entry.get('timestamp', '')[:8]}_"
-                f"{entry.get('action', '')}"
-            )
-            if key not in seen:
-                seen.add(key)
-                merged.append({
-                    "time": entry.get("timestamp", "")[:19],
-                    "action": entry.get("action", ""),
-                    "detail": entry.get("detail", "")
-                })
-        if merged:
-            st.dataframe(
-                pd.DataFrame(merged[:50]), hide_index=True
-            )
+        rows = list(islice(_merged_activity(), 50))
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
         else:
             empty_state("📝", "No activity yet")
 
     with t4:
         st.markdown("### Persistent Trade History")
-        trades = _db.get_trades(limit=100)
-        if trades:
+        total = int(_db.get_trade_summary().get("total") or 0)
+        if total:
+            start = page_selector(total, "th_page")
+            trades = _db.get_trades(limit=C.TABLE_PAGE_SIZE, offset=start)
             st.dataframe(pd.DataFrame(trades), hide_index=True)
         else:
             empty_state(
@@ -1224,55 +1591,28 @@ def page_positions():
         if not opt_pos:
             empty_state("📭", "No option positions")
         else:
-            total = 0.0
-            rows = []
-            for p in opt_pos:
-                pt = detect_position_type(p)
-                avg = safe_float(p.get("average_price", 0))
-                ltp = safe_float(p.get("ltp", avg))
-                q = abs(safe_int(p.get("quantity", 0)))
-                pnl = calculate_pnl(pt, avg, ltp, q)
-                total += pnl
-                rows.append({
-                    "Instrument": C.api_code_to_display(
-                        p.get("stock_code", "")
-                    ),
-                    "Strike": p.get("strike_price"),
-                    "Type": C.normalize_option_type(
-                        p.get("right", "")
-                    ),
-                    "Position": pt.upper(),
-                    "Qty": q,
-                    "Avg": f"₹{avg:.2f}",
-                    "LTP": f"₹{ltp:.2f}",
-                    "P&L": f"₹{pnl:+,.2f}",
-                    "Expiry": format_expiry(
-                        p.get("expiry_date", "")
-                    ),
-                    "Close": get_closing_action(pt).upper()
-                })
-            st.metric("Options P&L", format_currency(total))
-            st.dataframe(pd.DataFrame(rows), hide_index=True)
+            pf = option_position_frame(opt_pos)
+            st.metric("Options P&L", format_currency(float(pf["pnl"].sum())))
+            st.dataframe(pd.DataFrame({
+                "Instrument": pf["inst"],
+                "Strike": pf["strike"],
+                "Type": pf["type"],
+                "Position": pf["pt"].str.upper(),
+                "Qty": pf["qty"],
+                "Avg": pf["avg"].map("₹{:.2f}".format),
+                "LTP": pf["ltp"].map("₹{:.2f}".format),
+                "P&L": pf["pnl"].map("₹{:+,.2f}".format),
+                "Expiry": pf["expiry"].map(format_expiry),
+                "Close": pf["close"].str.upper(),
+            }), hide_index=True)
 
     with t2:
         if not eq_pos:
             empty_state("📦", "No equity positions")
         else:
-            eq_rows = []
-            for p in eq_pos:
-                eq_rows.append({
-                    "Stock": p.get("stock_code", ""),
-                    "Qty": safe_int(p.get("quantity", 0)),
-                    "Avg": f"₹{safe_float(p.get('average_price', 0)):.2f}",
-                    "LTP": f"₹{safe_float(p.get('ltp', 0)):.2f}",
-                    "P&L": f"₹{safe_float(p.get('pnl', 0)):+,.2f}",
-                    "Type": p.get("product_type", "")
-                })
-            total_eq = sum(
-                safe_float(p.get("pnl", 0)) for p in eq_pos
-            )
+            eq_table, total_eq = equity_position_table(eq_pos)
             st.metric("Equity P&L", format_currency(total_eq))
-            st.dataframe(pd.DataFrame(eq_rows), hide_index=True)
+            st.dataframe(eq_table, hide_index=True)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1366,21 +1706,30 @@ def page_strategy_builder():
                     "strat_expiry", expiry
                 )
                 with st.spinner("Fetching quotes for all legs..."):
-                    for leg in legs:
-                        try:
-                            r = client.get_quotes(
+                    # Legs are independent quotes: overlap the round-trips
+                    with ThreadPoolExecutor(
+                        max_workers=min(8, len(legs))
+                    ) as pool:
+                        futures = {
+                            pool.submit(
+                                client.get_quotes,
                                 scfg.api_code, scfg.exchange,
-                                sexpiry, leg.strike,
-                                leg.option_type
-                            )
-                            if r["success"]:
-                                items = APIResponse(r).items
-                                if items:
-                                    leg.premium = safe_float(
-                                        items[0].get("ltp", 0)
-                                    )
-                        except Exception:
-                            pass
+                                sexpiry, leg.strike, leg.option_type
+                            ): leg
+                            for leg in legs
+                        }
+                        for fut in as_completed(futures):
+                            leg = futures[fut]
+                            try:
+                                r = fut.result()
+                                if r["success"]:
+                                    items = response_items(r)
+                                    if items:
+                                        leg.premium = safe_float(
+                                            items[0].get("ltp", 0)
+                                        )
+                            except Exception:
+                                pass
                     st.session_state.strat_legs = legs
 
                 metrics = calculate_strategy_metrics(legs)
@@ -1418,218 +1767,205 @@ def page_strategy_builder():
 # PAGE: ANALYTICS
 # ═══════════════════════════════════════════════════════════════
 
-@error_handler
-@require_auth
-def page_analytics():
-    st.markdown(
-        '<h1 class="page-header">📈 Analytics</h1>',
-        unsafe_allow_html=True
-    )
-    client = get_client()
-    if not client:
+def _render_greeks_tab(client):
+    all_pos = get_cached_positions(client)
+    if all_pos is None:
+        st.error("❌ Failed")
+        return
+    opt_pos, _ = split_positions(all_pos)
+    if not opt_pos:
+        empty_state(
+            "📊", "No options for Greeks calculation"
+        )
         return
 
-    t1, t2, t3 = st.tabs([
-        "📊 Portfolio Greeks", "💰 Margin", "📈 Performance"
-    ])
+    st.markdown("### Portfolio Greeks")
+    spot_prices = fetch_spot_prices(client, opt_pos)
 
-    with t1:
-        all_pos = get_cached_positions(client)
-        if all_pos is None:
-            st.error("❌ Failed")
-            return
-        opt_pos, _ = split_positions(all_pos)
-        if not opt_pos:
-            empty_state(
-                "📊", "No options for Greeks calculation"
-            )
-            return
+    if spot_prices:
+        spot_display = ", ".join(
+            f"{C.api_code_to_display(k)}: ₹{v:,.0f}"
+            for k, v in spot_prices.items()
+        )
+        st.caption(f"Spot prices: {spot_display}")
+    else:
+        st.warning(
+            "⚠️ Could not fetch spot prices. "
+            "Greeks will use ATM estimates at 20% IV."
+        )
+
+    pf = option_position_frame(opt_pos)
+    strike = pf["strike_px"].to_numpy()
+    ltp = pf["quote"].to_numpy()
+    is_call = pf["type"].to_numpy() == "CE"
+
+    spot = pf["stock"].map(spot_prices).fillna(0).to_numpy(dtype=float)
+    from_api = spot > 0
+    spot = np.where(from_api, spot, strike)
+
+    expiries = pf["expiry"]
+    dte = {e: calculate_days_to_expiry(e) if e else 30 for e in expiries.unique()}
+    tte = np.maximum(expiries.map(dte).to_numpy(dtype=float) / C.DAYS_PER_YEAR, 0.001)
+
+    # One batch IV solve and one Greeks pass over every leg. Legs priced
+    # off the strike fallback keep the default IV: solving at S = K only
+    # fits noise.
+    iv = np.full(len(pf), 0.20)
+    quoted = (ltp > 0) & from_api
+    if quoted.any():
+        iv[quoted] = estimate_implied_volatility(
+            ltp[quoted], spot[quoted], strike[quoted],
+            tte[quoted], is_call[quoted]
+        )
+    signed_qty = np.where(pf["pt"] == "short", -1, 1) * pf["qty"].to_numpy()
+    g = {
+        k: np.nan_to_num(v * signed_qty, nan=0.0, posinf=0.0, neginf=0.0)
+        for k, v in calculate_greeks_vec(spot, strike, tte, iv, is_call).items()
+    }
+
+    spot_src = np.where(from_api, "API", "≈strike")
+    st.dataframe(pd.DataFrame({
+        "Position": pf["inst"],
+        "Strike": strike.astype(int),
+        "Type": pf["type"],
+        "Dir": pf["pt"].str.upper(),
+        "Qty": pf["qty"],
+        "Spot": [f"₹{s:,.0f} ({src})" for s, src in zip(spot, spot_src)],
+        "IV": [
+            f"{v * 100:.1f}%" if q else f"{v * 100:.1f}% (default)"
+            for v, q in zip(iv, quoted)
+        ],
+        "Delta": [f"{v:+.2f}" for v in g["delta"]],
+        "Gamma": [f"{v:+.4f}" for v in g["gamma"]],
+        "Theta": [f"{v:+.2f}" for v in g["theta"]],
+        "Vega": [f"{v:+.2f}" for v in g["vega"]],
+        "P&L": pf["pnl"].map("₹{:+,.2f}".format),
+    }), hide_index=True)
+
+    agg = {k: float(g[k].sum()) for k in ['delta', 'gamma', 'theta', 'vega']}
+    ac1, ac2, ac3, ac4 = st.columns(4)
+    ac1.metric("Net Delta", f"{agg['delta']:+.2f}")
+    ac2.metric("Net Gamma", f"{agg['gamma']:+.4f}")
+    ac3.metric(
+        "Net Theta", f"{agg['theta']:+.2f}/day"
+    )
+    ac4.metric("Net Vega", f"{agg['vega']:+.2f}")
 
-        st.markdown("### Portfolio Greeks")
-        spot_prices = fetch_spot_prices(client, opt_pos)
 
-        if spot_prices:
-            spot_display = ", ".join(
-                f"{C.api_code_to_display(k)}: ₹{v:,.0f}"
-                for k, v in spot_prices.items()
+def _render_margin_tab(client):
+    st.markdown("### Margin Analysis")
+    funds = get_cached_funds(client)
+    if funds:
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric(
+                "Total Balance",
+                format_currency(funds["total_balance"])
             )
-            st.caption(f"Spot prices: {spot_display}")
-        else:
-            st.warning(
-                "⚠️ Could not fetch spot prices. "
-                "Greeks will use ATM estimates."
+            st.metric(
+                "F&O Allocated",
+                format_currency(funds["allocated_fno"])
             )
-
-        rows = []
-        for p in opt_pos:
-            pt = detect_position_type(p)
-            qty = abs(safe_int(p.get("quantity", 0)))
-            strike = safe_float(p.get("strike_price", 0))
-            ltp = safe_float(p.get("ltp", 0))
-            ot = C.normalize_option_type(p.get("right", ""))
-            exp = p.get("expiry_date", "")
-            stock = p.get("stock_code", "")
-            multiplier = -1 if pt == "short" else 1
-
-            spot = spot_prices.get(stock, 0)
-            spot_source = "API"
-            if spot <= 0:
-                spot = strike
-                spot_source = "≈strike"
-
-            try:
-                dte = (
-                    calculate_days_to_expiry(exp)
-                    if exp else 30
-                )
-                tte = max(dte / C.DAYS_PER_YEAR, 0.001)
-                if ltp > 0 and spot > 0:
-                    iv = estimate_implied_volatility(
-                        ltp, spot, strike, tte, ot
-                    )
-                else:
-                    iv = 0.20
-                g = calculate_greeks(spot, strike, tte, iv, ot)
-                for k in g:
-                    g[k] = g[k] * multiplier * qty
-            except Exception:
-                g = {
-                    'delta': 0, 'gamma': 0,
-                    'theta': 0, 'vega': 0, 'rho': 0
-                }
-                iv = 0.0
-
-            pnl = calculate_pnl(
-                pt,
-                safe_float(p.get("average_price", 0)),
-                ltp, qty
+            st.metric(
+                "Equity Allocated",
+                format_currency(funds["allocated_equity"])
+            )
+        with c2:
+            st.metric(
+                "Unallocated",
+                format_currency(funds["unallocated"])
             )
+            st.metric(
+                "Blocked F&O",
+                format_currency(funds["block_fno"])
+            )
+            util = (
+                funds["allocated_fno"]
+                / funds["total_balance"] * 100
+                if funds["total_balance"] > 0 else 0
+            )
+            st.metric("Utilization", f"{util:.1f}%")
+            if util > 80:
+                st.warning("⚠️ High margin utilization!")
+
+        chart_data = pd.DataFrame({
+            "Category": [
+                "F&O", "Equity", "Unallocated", "Blocked"
+            ],
+            "Amount": [
+                funds["allocated_fno"],
+                funds["allocated_equity"],
+                funds["unallocated"],
+                funds["block_fno"]
+            ]
+        })
+        chart_data = chart_data[chart_data["Amount"] > 0]
+        if not chart_data.empty:
+            st.bar_chart(chart_data.set_index("Category"))
 
-            rows.append({
-                "Position": C.api_code_to_display(stock),
-                "Strike": int(strike),
-                "Type": ot,
-                "Dir": pt.upper(),
-                "Qty": qty,
-                "Spot": f"₹{spot:,.0f} ({spot_source})",
-                "IV": f"{iv * 100:.1f}%",
-                "Delta": f"{g['delta']:+.2f}",
-                "Gamma": f"{g['gamma']:+.4f}",
-                "Theta": f"{g['theta']:+.2f}",
-                "Vega": f"{g['vega']:+.2f}",
-                "P&L": f"₹{pnl:+,.2f}"
-            })
 
-        if rows:
-            st.dataframe(pd.DataFrame(rows), hide_index=True)
+def _render_performance_tab():
+    st.markdown("### Performance")
+    activity = SessionState.get_activity_log()
+    trades_session = [
+        a for a in activity
+        if a["action"] in ("Sell", "SqOff")
+    ]
+    st.write(f"**Session actions:** {len(activity)}")
+    st.write(f"**Session trades:** {len(trades_session)}")
 
-            agg = {k: 0.0 for k in ['delta', 'gamma', 'theta', 'vega']}
-            for r in rows:
-                for k in agg:
-                    col_name = k.capitalize()
-                    try:
-                        agg[k] += float(
-                            r[col_name].replace('+', '')
-                        )
-                    except (ValueError, KeyError):
-                        pass
-
-            ac1, ac2, ac3, ac4 = st.columns(4)
-            ac1.metric("Net Delta", f"{agg['delta']:+.2f}")
-            ac2.metric("Net Gamma", f"{agg['gamma']:+.4f}")
-            ac3.metric(
-                "Net Theta", f"{agg['theta']:+.2f}/day"
-            )
-            ac4.metric("Net Vega", f"{agg['vega']:+.2f}")
+    summary = _db.get_trade_summary()
+    if summary and summary.get("total", 0) > 0:
+        st.markdown("---")
+        st.markdown("#### All-Time (Persistent)")
+        pc1, pc2, pc3 = st.columns(3)
+        pc1.metric("Total Trades", summary.get("total", 0))
+        pc2.metric(
+            "Premium Sold",
+            format_currency(summary.get("sold", 0))
+        )
+        pc3.metric(
+            "Premium Bought",
+            format_currency(summary.get("bought", 0))
+        )
+        net = (
+            (summary.get("sold", 0) or 0)
+            - (summary.get("bought", 0) or 0)
+        )
+        st.metric("Net Premium", format_currency(net))
 
-    with t2:
-        st.markdown("### Margin Analysis")
-        funds = get_cached_funds(client)
-        if funds:
-            c1, c2 = st.columns(2)
-            with c1:
-                st.metric(
-                    "Total Balance",
-                    format_currency(funds["total_balance"])
-                )
-                st.metric(
-                    "F&O Allocated",
-                    format_currency(funds["allocated_fno"])
-                )
-                st.metric(
-                    "Equity Allocated",
-                    format_currency(funds["allocated_equity"])
-                )
-            with c2:
-                st.metric(
-                    "Unallocated",
-                    format_currency(funds["unallocated"])
-                )
-                st.metric(
-                    "Blocked F&O",
-                    format_currency(funds["block_fno"])
-                )
-                util = (
-                    funds["allocated_fno"]
-                    / funds["total_balance"] * 100
-                    if funds["total_balance"] > 0 else 0
-                )
-                st.metric("Utilization", f"{util:.1f}%")
-                if util > 80:
-                    st.warning("⚠️ High margin utilization!")
-
-            chart_data = pd.DataFrame({
-                "Category": [
-                    "F&O", "Equity", "Unallocated", "Blocked"
-                ],
-                "Amount": [
-                    funds["allocated_fno"],
-                    funds["allocated_equity"],
-                    funds["unallocated"],
-                    funds["block_fno"]
-                ]
-            })
-            chart_data = chart_data[chart_data["Amount"] > 0]
-            if not chart_data.empty:
-                st.bar_chart(chart_data.set_index("Category"))
+    recent = _db.get_activities(limit=20)
+    if recent:
+        st.markdown("---")
+        st.markdown("#### Recent Activity (Persistent)")
+        st.dataframe(
+            pd.DataFrame(recent), hide_index=True
+        )
 
-    with t3:
-        st.markdown("### Performance")
-        activity = SessionState.get_activity_log()
-        trades_session = [
-            a for a in activity
-            if a["action"] in ("Sell", "SqOff")
-        ]
-        st.write(f"**Session actions:** {len(activity)}")
-        st.write(f"**Session trades:** {len(trades_session)}")
-
-        summary = _db.get_trade_summary()
-        if summary and summary.get("total", 0) > 0:
-            st.markdown("---")
-            st.markdown("#### All-Time (Persistent)")
-            pc1, pc2, pc3 = st.columns(3)
-            pc1.metric("Total Trades", summary.get("total", 0))
-            pc2.metric(
-                "Premium Sold",
-                format_currency(summary.get("sold", 0))
-            )
-            pc3.metric(
-                "Premium Bought",
-                format_currency(summary.get("bought", 0))
-            )
-            net = (
-                (summary.get("sold", 0) or 0)
-                - (summary.get("bought", 0) or 0)
-            )
-            st.metric("Net Premium", format_currency(net))
 
-        recent = _db.get_activities(limit=20)
-        if recent:
-            st.markdown("---")
-            st.markdown("#### Recent Activity (Persistent)")
-            st.dataframe(
-                pd.DataFrame(recent), hide_index=True
-            )
+@error_handler
+@require_auth
+def page_analytics():
+    st.markdown(
+        '<h1 class="page-header">📈 Analytics</h1>',
+        unsafe_allow_html=True
+    )
+    client = get_client()
+    if not client:
+        return
+
+    # st.tabs runs every tab body on each rerun; a radio renders only the
+    # selected one, so the other tabs' fetches and compute are skipped.
+    tab = st.radio(
+        "View", ["📊 Portfolio Greeks", "💰 Margin", "📈 Performance"],
+        horizontal=True, key="ana_tab", label_visibility="collapsed"
+    )
+    if tab == "📊 Portfolio Greeks":
+        _render_greeks_tab(client)
+    elif tab == "💰 Margin":
+        _render_margin_tab(client)
+    else:
+        _render_performance_tab()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1647,11 +1983,10 @@ def page_risk_monitor():
     if not client:
         return
 
-    if "risk_monitor" not in st.session_state:
-        st.session_state.risk_monitor = RiskMonitor(
-            api_client=client, poll_interval=15.0
-        )
-    monitor: RiskMonitor = st.session_state.risk_monitor
+    monitor = get_risk_monitor(client)
+    # One locked snapshot per rerun; every mutation below calls st.rerun()
+    monitored = monitor.get_monitored_summary()
+    history = monitor.get_alert_history()
 
     # ── Controls ──────────────────────────────────────────
     c1, c2, c3 = st.columns(3)
@@ -1669,12 +2004,12 @@ def page_risk_monitor():
     with c2:
         st.metric(
             "Monitored Positions",
-            len(monitor.get_monitored_summary())
+            len(monitored)
         )
     with c3:
         st.metric(
             "Alert History",
-            len(monitor.get_alert_history())
+            len(history)
         )
 
     st.markdown("---")
@@ -1696,21 +2031,17 @@ def page_risk_monitor():
         if not opt_pos:
             empty_state("📭", "No option positions to monitor")
         else:
-            already = {
-                m["id"] for m in monitor.get_monitored_summary()
-            }
+            already = {m["id"] for m in monitored}
 
-            for p in opt_pos:
-                stock = p.get("stock_code", "")
-                strike_val = safe_int(p.get("strike_price", 0))
-                ot = C.normalize_option_type(p.get("right", ""))
-                pt = detect_position_type(p)
-                qty = abs(safe_int(p.get("quantity", 0)))
-                avg = safe_float(p.get("average_price", 0))
+            # Display name, type, side, qty and avg come from one column-wise pass
+            pf = option_position_frame(opt_pos)
+            for p, r in zip(opt_pos, pf.itertuples(index=False)):
+                stock, strike_val = r.stock, int(r.strike_px)
+                ot, pt, qty, avg = r.type, r.pt, int(r.qty), float(r.avg)
                 pid = f"{stock}_{strike_val}_{ot}"
 
                 label = (
-                    f"{C.api_code_to_display(stock)} "
+                    f"{r.inst} "
                     f"{strike_val} {ot} "
                     f"({pt.upper()} x{qty})"
                 )
@@ -1745,7 +2076,6 @@ def page_risk_monitor():
     # ── Tab 2: Configure Stops ────────────────────────────
     with tab2:
         st.markdown("### Configure Stop-Losses")
-        monitored = monitor.get_monitored_summary()
 
         if not monitored:
             empty_state(
@@ -1754,6 +2084,7 @@ def page_risk_monitor():
             )
         else:
             for m in monitored:
+                pid = m["id"]
                 status_icon = (
                     "🔴" if m["triggered"] else "🟢"
                 )
@@ -1781,19 +2112,19 @@ def page_risk_monitor():
                             value=float(default_stop),
                             min_value=0.01,
                             step=0.5,
-                            key=f"stop_{m['id']}"
+                            key=f"stop_{pid}"
                         )
                         if st.button(
                             "Set Fixed Stop",
-                            key=f"set_stop_{m['id']}"
+                            key=f"set_stop_{pid}"
                         ):
                             monitor.set_stop_loss(
-                                m["id"], stop_price
+                                pid, stop_price
                             )
                             _db.log_activity(
                                 "STOP_SET",
                                 f"Fixed stop ₹{stop_price:.2f} "
-                                f"on {m['id']}"
+                                f"on {pid}"
                             )
                             st.success(
                                 f"✅ Stop set at "
@@ -1808,20 +2139,20 @@ def page_risk_monitor():
                             max_value=200,
                             value=50,
                             step=5,
-                            key=f"trail_{m['id']}"
+                            key=f"trail_{pid}"
                         )
                         if st.button(
                             "Set Trailing Stop",
-                            key=f"set_trail_{m['id']}"
+                            key=f"set_trail_{pid}"
                         ):
                             monitor.set_trailing_stop(
-                                m["id"],
+                                pid,
                                 trail_pct / 100.0
                             )
                             _db.log_activity(
                                 "TRAIL_SET",
                                 f"Trail {trail_pct}% "
-                                f"on {m['id']}"
+                                f"on {pid}"
                             )
                             st.success(
                                 f"✅ Trailing stop set "
@@ -1846,25 +2177,23 @@ def page_risk_monitor():
 
                     if st.button(
                         "🗑️ Remove from Monitor",
-                        key=f"rm_{m['id']}"
+                        key=f"rm_{pid}"
                     ):
-                        monitor.remove_position(m["id"])
+                        monitor.remove_position(pid)
                         st.rerun()
 
     # ── Tab 3: Alert History ──────────────────────────────
     with tab3:
         st.markdown("### Alert History")
-        history = monitor.get_alert_history()
         if history:
-            alert_rows = [{
-                "Time": a.timestamp,
-                "Level": a.level,
-                "Category": a.category,
-                "Message": a.message,
-                "Position": a.position_id
-            } for a in history]
+            last = history[-1]
             st.dataframe(
-                pd.DataFrame(alert_rows), hide_index=True
+                alert_history_table(
+                    (id(monitor), len(history), last.timestamp,
+                     last.position_id, last.message),
+                    history
+                ),
+                hide_index=True
             )
         else:
             empty_state(
@@ -1873,22 +2202,18 @@ def page_risk_monitor():
                 "are triggered"
             )
 
-        db_alerts = _db.get_activities(limit=20)
-        alert_activities = [
-            a for a in db_alerts
-            if a.get("action", "").startswith(
-                ("STOP_", "TRAIL_", "MONITOR_")
-            )
-        ]
-        if alert_activities:
+        db_alerts = _db.get_activities_by_prefix(
+            RISK_ACTION_PREFIXES, limit=20
+        )
+        alert_activities = risk_activity_table(
+            tuple(a.get("id") for a in db_alerts), db_alerts
+        )
+        if alert_activities.num_rows:
             st.markdown("---")
             st.markdown(
                 "#### Risk Activity Log (Persistent)"
             )
-            st.dataframe(
-                pd.DataFrame(alert_activities),
-                hide_index=True
-            )
+            st.dataframe(alert_activities, hide_index=True)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1909,29 +2234,37 @@ PAGE_FN = {
 
 
 def main():
+    _run_memo.clear()
     try:
         SessionState.initialize()
+        if (
+            is_authenticated()
+            and SessionState.get_current_page() == "Dashboard"
+        ):
+            client = SessionState.get_client()
+            if client and client.is_connected():
+                prefetch_account(client)
         render_sidebar()
         render_alert_banner()
         st.markdown("---")
 
         page = SessionState.get_current_page()
 
-        if page in AUTH_PAGES and not SessionState.is_authenticated():
+        if page in AUTH_PAGES and not is_authenticated():
             st.warning("🔒 Login required")
             st.info("👈 Use the sidebar to connect")
             return
 
         if (
-            SessionState.is_authenticated()
+            is_authenticated()
             and SessionState.is_session_expired()
         ):
             st.error("🔴 Session expired. Please reconnect.")
             if st.button("🔄 Reconnect", type="primary"):
-                monitor = st.session_state.get("risk_monitor")
+                monitor = get_risk_monitor()
                 if monitor:
                     monitor.stop()
-                SessionState.set_authentication(False, None)
+                set_authentication(False, None)
                 SessionState.navigate_to("Dashboard")
                 st.rerun()
             return
@@ -1943,7 +2276,7 @@ def main():
         st.error(
             "❌ Critical error. Please refresh the page."
         )
-        if st.session_state.get("debug_mode"):
+        if is_debug():
             st.exception(e)
 
 
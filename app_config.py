@@ -3,12 +3,18 @@ Configuration — instruments, expiry logic, constants.
 All pure logic. No external dependencies.
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Literal, Optional
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Literal, Mapping, Optional, Tuple
 from dataclasses import dataclass
-import pytz
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8
+    from backports.zoneinfo import ZoneInfo
 
-IST = pytz.timezone("Asia/Kolkata")
+IST = ZoneInfo("Asia/Kolkata")
 
 MARKET_PRE_OPEN_START = (9, 0)
 MARKET_OPEN = (9, 15)
@@ -22,6 +28,7 @@ QUOTE_CACHE_TTL_SECONDS = 5
 POSITION_CACHE_TTL_SECONDS = 10
 FUNDS_CACHE_TTL_SECONDS = 60
 SPOT_CACHE_TTL_SECONDS = 30
+ORDERS_CACHE_TTL_SECONDS = 30
 
 MAX_ACTIVITY_LOG_ENTRIES = 100
 MAX_LOTS_PER_ORDER = 1000
@@ -29,6 +36,13 @@ MIN_LOTS_PER_ORDER = 1
 RISK_FREE_RATE = 0.065
 DAYS_PER_YEAR = 365
 
+# Tables with at most this many rows render as plain HTML, skipping the
+# DataFrame + Arrow round-trip st.dataframe needs.
+SMALL_TABLE_THRESHOLD = 5
+
+# Rows per page for long order/trade tables
+TABLE_PAGE_SIZE = 50
+
 
 @dataclass(frozen=True)
 class InstrumentConfig:
@@ -46,7 +60,8 @@ class InstrumentConfig:
     max_strike: int = 999999
 
 
-INSTRUMENTS: Dict[str, InstrumentConfig] = {
+# Read-only: the lookup tables below are derived from it once at import
+INSTRUMENTS: Mapping[str, InstrumentConfig] = MappingProxyType({
     "NIFTY": InstrumentConfig(
         "NIFTY", "NIFTY", "NFO", 65, 0.05, 50, "Tuesday",
         "NIFTY 50 Index", "NIFTY", "NSE", 15000, 30000),
@@ -65,38 +80,57 @@ INSTRUMENTS: Dict[str, InstrumentConfig] = {
     "BANKEX": InstrumentConfig(
         "BANKEX", "BANKEX", "BFO", 15, 0.05, 100, "Monday",
         "BSE BANKEX", "BANKEX", "BSE", 40000, 80000),
-}
+})
 
 DAY_NUM = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4}
 
+# Reverse index: Breeze api_code → (display name, config). Built once at import.
+_BY_API_CODE: Dict[str, tuple] = {c.api_code: (n, c) for n, c in INSTRUMENTS.items()}
+# Weekday number of each instrument's expiry, for the expiry calendar
+_EXPIRY_DAY_NUM: Dict[str, int] = {n: DAY_NUM[c.expiry_day] for n, c in INSTRUMENTS.items()}
+# (min_strike, max_strike, strike_gap) per instrument, for validate_strike
+_STRIKE_RULES: Dict[str, Tuple[int, int, int]] = {
+    n: (c.min_strike, c.max_strike, c.strike_gap) for n, c in INSTRUMENTS.items()
+}
+
 
 def get_instrument(name: str) -> InstrumentConfig:
-    if name not in INSTRUMENTS:
-        raise KeyError(f"Unknown instrument: {name}")
-    return INSTRUMENTS[name]
+    try:
+        return INSTRUMENTS[name]
+    except KeyError:
+        raise KeyError(f"Unknown instrument: {name}") from None
+
+
+def get_instrument_by_api_code(api_code: str) -> Optional[InstrumentConfig]:
+    hit = _BY_API_CODE.get(api_code)
+    return hit[1] if hit else None
 
 
 def get_next_expiries(instrument_name: str, count: int = 5) -> List[str]:
-    try:
-        inst = get_instrument(instrument_name)
-    except KeyError:
-        return []
-    target_day = DAY_NUM[inst.expiry_day]
     now = datetime.now(IST)
-    days_ahead = (target_day - now.weekday()) % 7
-    if days_ahead == 0 and now.hour >= 15 and now.minute >= 30:
+    past_cutoff = (now.hour, now.minute) >= MARKET_CLOSE
+    return list(_next_expiries(instrument_name, count, now.date(), past_cutoff))
+
+
+@lru_cache(maxsize=64)
+def _next_expiries(instrument_name: str, count: int, today: date,
+                   past_cutoff: bool) -> Tuple[str, ...]:
+    """Keyed on the calendar date, so memoized lists roll over at midnight."""
+    target_day = _EXPIRY_DAY_NUM.get(instrument_name)
+    if target_day is None:
+        return ()
+    days_ahead = (target_day - today.weekday()) % 7
+    if days_ahead == 0 and past_cutoff:
         days_ahead = 7
-    next_exp = now + timedelta(days=days_ahead) if days_ahead > 0 else now
-    return [(next_exp + timedelta(weeks=i)).strftime("%Y-%m-%d") for i in range(count)]
+    next_exp = today + timedelta(days=days_ahead)
+    return tuple((next_exp + timedelta(weeks=i)).isoformat() for i in range(count))
 
 
 def api_code_to_display(api_code: str) -> str:
     if not api_code:
         return ""
-    for name, config in INSTRUMENTS.items():
-        if config.api_code == api_code:
-            return name
-    return api_code
+    hit = _BY_API_CODE.get(api_code)
+    return hit[0] if hit else api_code
 
 
 def display_to_api_code(display_name: str) -> str:
@@ -105,52 +139,80 @@ def display_to_api_code(display_name: str) -> str:
     return display_name
 
 
+_CALL_ALIASES = frozenset({"call", "ce", "c"})
+_PUT_ALIASES = frozenset({"put", "pe", "p"})
+
+
+@lru_cache(maxsize=64)
 def normalize_option_type(option_str: Optional[str]) -> str:
     if option_str is None or option_str == "":
         return "N/A"
     s = str(option_str).strip().lower()
     if not s:
         return "N/A"
-    if s in ('call', 'ce', 'c'):
+    if s in _CALL_ALIASES:
         return 'CE'
-    elif s in ('put', 'pe', 'p'):
+    elif s in _PUT_ALIASES:
         return 'PE'
     return str(option_str).upper()
 
 
+OPTION_PRODUCT_TYPES = frozenset({"options"})
+EQUITY_PRODUCT_TYPES = frozenset({"easymargin", "cash", "delivery", "margin"})
+
+
+def _lower(value) -> str:
+    """Lowercased field value; skips the str() copy for the usual str case."""
+    if type(value) is str:
+        return value.lower()
+    return "" if value is None else str(value).lower()
+
+
 def is_option_position(position: Dict) -> bool:
-    product_type = str(position.get("product_type", "")).lower()
-    if product_type == "options":
+    product_type = _lower(position.get("product_type", ""))
+    if product_type in OPTION_PRODUCT_TYPES:
         return True
-    segment = str(position.get("segment", "")).lower()
+    segment = _lower(position.get("segment", ""))
     if segment == "fno" and position.get("right") is not None:
         return True
     return False
 
 
 def is_equity_position(position: Dict) -> bool:
-    segment = str(position.get("segment", "")).lower()
-    product_type = str(position.get("product_type", "")).lower()
-    if segment == "equity" or product_type in ("easymargin", "cash", "delivery", "margin"):
+    segment = _lower(position.get("segment", ""))
+    product_type = _lower(position.get("product_type", ""))
+    if segment == "equity" or product_type in EQUITY_PRODUCT_TYPES:
         return True
     return False
 
 
 def validate_strike(instrument_name: str, strike: int) -> bool:
-    try:
-        inst = get_instrument(instrument_name)
-        return inst.min_strike <= strike <= inst.max_strike and strike % inst.strike_gap == 0
-    except KeyError:
+    rule = _STRIKE_RULES.get(instrument_name)
+    if rule is None:
         return False
+    lo, hi, gap = rule
+    return lo <= strike <= hi and strike % gap == 0
+
+
+# (monotonic time, result) of the last is_market_open evaluation
+_market_open_memo = (-1.0, False)
 
 
 def is_market_open() -> bool:
+    """Re-evaluated at most once a second; polling loops get the memoized answer."""
+    global _market_open_memo
+    t = time.monotonic()
+    if 0.0 <= t - _market_open_memo[0] < 1.0:
+        return _market_open_memo[1]
     now = datetime.now(IST)
     if now.weekday() >= 5:
-        return False
-    o = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0)
-    c = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0)
-    return o <= now <= c
+        is_open = False
+    else:
+        o = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0)
+        c = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0)
+        is_open = o <= now <= c
+    _market_open_memo = (t, is_open)
+    return is_open
 
 
 class ErrorMessages:
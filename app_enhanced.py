@@ -18,6 +18,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 import time
 import logging
 from typing import Dict, List, Optional, Tuple
@@ -29,8 +30,8 @@ import app_config as C
 
 # Import helpers (keeping compatibility)
 from helpers import (
-    APIResponse, safe_int, safe_float, safe_str, parse_funds,
-    detect_position_type, get_closing_action, calculate_pnl,
+    APIResponse, safe_float, safe_str, parse_funds, numeric_column,
+    detect_position_type, get_closing_action, calculate_pnl, position_totals,
     calculate_pcr, calculate_max_pain, estimate_atm_strike,
     add_greeks_to_chain, get_market_status, format_currency,
     format_expiry, calculate_days_to_expiry
@@ -93,8 +94,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Enhanced CSS with modern design
-st.markdown("""
+# Enhanced CSS with modern design. Emitted every run: Streamlit drops
+# elements a rerun does not re-emit.
+_CSS = """
 <style>
     /* Main Theme */
     .main {background-color: #f8f9fa;}
@@ -266,7 +268,9 @@ st.markdown("""
     ::-webkit-scrollbar-thumb {background: #888; border-radius: 4px;}
     ::-webkit-scrollbar-thumb:hover {background: #555;}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_CSS, unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -286,7 +290,7 @@ PAGES = [
     "⚙️ Settings"
 ]
 
-AUTH_PAGES = set(PAGES[1:])
+AUTH_PAGES = frozenset(PAGES[1:])
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -358,6 +362,18 @@ def get_client() -> Optional[BreezeAPIComplete]:
     return client
 
 
+def _store_funds(resp: Dict) -> Dict:
+    funds = parse_funds(resp)
+    CacheManager.set("funds", funds, "funds", C.FUNDS_CACHE_TTL_SECONDS)
+    return funds
+
+
+def _store_positions(resp: Dict) -> List[Dict]:
+    positions = resp.get("data", [])
+    CacheManager.set("positions", positions, "all", C.POSITION_CACHE_TTL_SECONDS)
+    return positions
+
+
 @timing_decorator
 def get_cached_funds(client: BreezeAPIComplete) -> Optional[Dict]:
     """Get funds with caching."""
@@ -367,9 +383,7 @@ def get_cached_funds(client: BreezeAPIComplete) -> Optional[Dict]:
     
     resp = client.get_funds()
     if resp["success"]:
-        funds = parse_funds(resp)
-        CacheManager.set("funds", "funds", funds, ttl=C.FUNDS_CACHE_TTL_SECONDS)
-        return funds
+        return _store_funds(resp)
     return None
 
 
@@ -382,12 +396,40 @@ def get_cached_positions(client: BreezeAPIComplete) -> Optional[List[Dict]]:
     
     resp = client.get_portfolio_positions()
     if resp["success"]:
-        positions = resp.get("data", [])
-        CacheManager.set("positions", "all", positions, ttl=C.POSITION_CACHE_TTL_SECONDS)
-        return positions
+        return _store_positions(resp)
     return None
 
 
+def prefetch_account(client: BreezeAPIComplete) -> None:
+    """
+    When funds and positions both miss, fetch them concurrently so a cold
+    dashboard waits for one round-trip instead of two. Results land in the
+    caches; get_cached_funds / get_cached_positions then return instantly.
+    """
+    misses = {}
+    if not CacheManager.get("funds", "funds"):
+        misses["funds"] = (client.get_funds, _store_funds)
+    if not CacheManager.get("positions", "all"):
+        misses["positions"] = (client.get_portfolio_positions, _store_positions)
+    if len(misses) < 2:
+        return
+
+    # Only the network calls run in the pool; cache writes stay on the
+    # script thread (workers have no Streamlit context).
+    with ThreadPoolExecutor(max_workers=len(misses)) as pool:
+        futures = {
+            name: (pool.submit(fetch), store)
+            for name, (fetch, store) in misses.items()
+        }
+    for name, (fut, store) in futures.items():
+        try:
+            resp = fut.result()
+            if resp["success"]:
+                store(resp)
+        except Exception as e:
+            log.warning(f"Prefetch {name} failed: {e}")
+
+
 def format_pnl(pnl: float, with_color: bool = True) -> str:
     """Format P&L with optional color."""
     formatted = format_currency(pnl)
@@ -461,9 +503,8 @@ def show_login_page():
                             global _risk_monitor
                             _risk_monitor = RiskMonitor(client, _db)
                             
-                            st.success("✅ Connected successfully!")
-                            st.balloons()
-                            time.sleep(1)
+                            # A toast survives st.rerun(); no pause needed
+                            Notifications.success("Connected successfully!")
                             st.rerun()
                         else:
                             st.error(f"❌ Connection failed: {result.get('message', 'Unknown error')}")
@@ -492,6 +533,21 @@ def show_login_page():
 # DASHBOARD PAGE
 # ═══════════════════════════════════════════════════════════════
 
+# Info-box class per get_market_status() string (the string carries its own
+# icon); both "Closed" variants fall through to danger-box
+MARKET_STATUS_BOXES = {
+    "🟢 Market Open": "success-box",
+    "🟠 Pre-Open": "warning-box",
+    "🟡 Pre-Market": "warning-box",
+}
+
+# Rupee display for the numeric price columns of the positions table
+POSITION_PRICE_COLUMNS = {
+    col: st.column_config.NumberColumn(col, format="₹%.2f")
+    for col in ("Avg Price", "LTP", "P&L")
+}
+
+
 @error_handler
 @require_auth
 @timing_decorator
@@ -505,20 +561,16 @@ def show_dashboard():
     
     # Market status banner
     market_status = get_market_status()
-    status_colors = {
-        "OPEN": ("🟢", "success-box"),
-        "CLOSED": ("🔴", "danger-box"),
-        "PRE-OPEN": ("🟡", "warning-box")
-    }
-    
-    icon, box_class = status_colors.get(market_status, ("⚪", "info-box"))
+    box_class = MARKET_STATUS_BOXES.get(market_status, "danger-box")
     st.markdown(
         f'<div class="{box_class}">'
-        f'{icon} <strong>Market Status:</strong> {market_status}'
+        f'<strong>Market Status:</strong> {market_status}'
         f'</div>',
         unsafe_allow_html=True
     )
     
+    prefetch_account(client)
+    
     # Funds overview
     funds = get_cached_funds(client)
     if funds:
@@ -559,8 +611,10 @@ def show_dashboard():
     positions = get_cached_positions(client)
     
     if positions:
-        total_pnl = sum(safe_float(p.get("pnl", 0)) for p in positions)
-        total_value = sum(safe_float(p.get("ltp", 0)) * safe_int(p.get("quantity", 0)) for p in positions)
+        # One frame feeds both the totals and the table below
+        df_positions = pd.DataFrame(positions)
+        totals = position_totals(df_positions)
+        total_pnl, total_value = totals["pnl"], totals["value"]
         
         col1, col2, col3 = st.columns(3)
         
@@ -580,7 +634,6 @@ def show_dashboard():
             st.metric("Portfolio Value", format_currency(total_value))
         
         # Positions table
-        df_positions = pd.DataFrame(positions)
         if not df_positions.empty:
             # Select and format columns
             display_cols = [
@@ -593,12 +646,17 @@ def show_dashboard():
                 "Symbol", "Exchange", "Type", "Qty", "Avg Price", "LTP", "P&L"
             ]
             
-            # Format numeric columns
-            df_display["Avg Price"] = df_display["Avg Price"].apply(lambda x: f"₹{x:,.2f}")
-            df_display["LTP"] = df_display["LTP"].apply(lambda x: f"₹{x:,.2f}")
-            df_display["P&L"] = df_display["P&L"].apply(lambda x: f"₹{x:,.2f}")
+            # Keep prices float64 so the grid sorts numerically; the
+            # frontend applies the ₹ formatting via POSITION_PRICE_COLUMNS
+            for col in POSITION_PRICE_COLUMNS:
+                df_display[col] = numeric_column(df_display, col)
             
-            st.dataframe(df_display, use_container_width=True, height=300)
+            st.dataframe(
+                df_display,
+                use_container_width=True,
+                height=300,
+                column_config=POSITION_PRICE_COLUMNS
+            )
     else:
         empty_state("📍", "No active positions", "Open positions will appear here")
     
@@ -636,6 +694,63 @@ def show_dashboard():
 # OPTION CHAIN PAGE (ENHANCED)
 # ═══════════════════════════════════════════════════════════════
 
+# strike_width per "Strike Range" choice; "All Strikes" is unfiltered
+CHAIN_STRIKE_WIDTHS = {"ATM ±5": 5, "ATM ±10": 10, "ATM ±20": 20, "Wide Range": 30}
+
+
+def _load_option_chain(client: BreezeAPIComplete, inst_config, expiry: str):
+    """
+    Fetch and process one chain; cache (df, spot_price, views) for
+    OC_CACHE_TTL_SECONDS, views holding the per-range renders.
+    Reports failures on the page and returns None.
+    """
+    # Chain and spot are independent requests: overlap them
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        chain_fut = pool.submit(
+            client.get_option_chain,
+            stock_code=inst_config.api_code,
+            exchange_code=inst_config.exchange,
+            expiry_date=expiry
+        )
+        spot_fut = pool.submit(
+            client.get_spot_price,
+            inst_config.spot_code or inst_config.api_code,
+            inst_config.spot_exchange or inst_config.exchange
+        )
+    raw_chain = chain_fut.result()
+
+    if not raw_chain.get("success"):
+        st.error(f"❌ Failed to fetch chain: {raw_chain.get('message', 'Unknown error')}")
+        return None
+
+    spot_price = spot_fut.result()
+
+    if spot_price <= 0:
+        st.warning("⚠️ Could not fetch spot price, using estimate")
+        spot_price = estimate_atm_strike(raw_chain.get("data", []))
+
+    # Process with advanced processor
+    df = _chain_processor.process_raw_chain(
+        raw_data=raw_chain,
+        spot_price=spot_price,
+        expiry_date=expiry
+    )
+
+    if df.empty:
+        st.warning("⚠️ No option chain data available")
+        return None
+
+    # Store in session state
+    st.session_state["chain_data"] = df
+    st.session_state["spot_price"] = spot_price
+    entry = (df, spot_price, {})
+    CacheManager.set(
+        f"{inst_config.api_code}_{expiry}", entry,
+        "option_chain", C.OC_CACHE_TTL_SECONDS
+    )
+    return entry
+
+
 @error_handler
 @require_auth
 @timing_decorator
@@ -696,129 +811,105 @@ def show_option_chain():
     with col4:
         export_data = st.checkbox("Enable Export", value=False, key="enable_export")
     
-    # Fetch button
-    if st.button("📊 Fetch Option Chain", use_container_width=True) or auto_refresh:
+    # Fetch on demand (button) or when the cached chain has expired (auto
+    # refresh). Filter and display toggles re-slice the cached chain.
+    chain_key = f"{inst_config.api_code}_{expiry}"
+    fetch = st.button("📊 Fetch Option Chain", use_container_width=True)
+    if fetch:
+        CacheManager.invalidate(chain_key, "option_chain")
+    cached = CacheManager.get(chain_key, "option_chain")
+    if cached is None and (fetch or auto_refresh):
         with st.spinner("Fetching option chain..."):
             try:
-                # Get option chain
-                raw_chain = client.get_option_chain(
-                    stock_code=inst_config.api_code,
-                    exchange_code=inst_config.exchange,
-                    expiry_date=expiry
-                )
-                
-                if not raw_chain.get("success"):
-                    st.error(f"❌ Failed to fetch chain: {raw_chain.get('message', 'Unknown error')}")
-                    return
-                
-                # Get spot price
-                spot_price = client.get_spot_price(
-                    inst_config.spot_code or inst_config.api_code,
-                    inst_config.spot_exchange or inst_config.exchange
-                )
-                
-                if spot_price <= 0:
-                    st.warning("⚠️ Could not fetch spot price, using estimate")
-                    spot_price = estimate_atm_strike(raw_chain.get("data", []))
-                
-                # Process with advanced processor
-                df = _chain_processor.process_raw_chain(
-                    raw_data=raw_chain,
-                    spot_price=spot_price,
-                    expiry_date=expiry
-                )
-                
-                if df.empty:
-                    st.warning("⚠️ No option chain data available")
-                    return
-                
-                # Store in session state
-                st.session_state["chain_data"] = df
-                st.session_state["spot_price"] = spot_price
-                
-                # Apply filtering
-                if filter_mode == "ATM ±5":
-                    df = _chain_processor.filter_by_strike_range(
-                        df, center_strike=spot_price, strike_width=5
-                    )
-                elif filter_mode == "ATM ±10":
-                    df = _chain_processor.filter_by_strike_range(
-                        df, center_strike=spot_price, strike_width=10
-                    )
-                elif filter_mode == "ATM ±20":
-                    df = _chain_processor.filter_by_strike_range(
-                        df, center_strike=spot_price, strike_width=20
-                    )
-                elif filter_mode == "Wide Range":
-                    df = _chain_processor.filter_by_strike_range(
-                        df, center_strike=spot_price, strike_width=30
-                    )
-                
-                # Display spot price
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    st.markdown(
-                        f'<div class="info-box" style="text-align: center;">'
-                        f'<strong>Spot Price:</strong> ₹{spot_price:,.2f}'
-                        f'</div>',
-                        unsafe_allow_html=True
-                    )
-                
-                # Analytics dashboard
-                if show_analytics and not df.empty:
-                    analytics = _chain_processor.get_chain_analytics(df)
-                    
-                    st.markdown("### 📊 Chain Analytics")
-                    col1, col2, col3, col4, col5 = st.columns(5)
-                    
-                    with col1:
-                        st.metric("PCR", f"{analytics['pcr']:.2f}")
-                    
-                    with col2:
-                        st.metric("Max Pain", f"₹{analytics['max_pain']:,.0f}")
-                    
-                    with col3:
-                        st.metric("Call OI", f"{analytics['total_call_oi']:,.0f}")
-                    
-                    with col4:
-                        st.metric("Put OI", f"{analytics['total_put_oi']:,.0f}")
-                    
-                    with col5:
-                        st.metric("ATM Strike", f"₹{analytics['atm_strike']:,.0f}")
-                
-                # Display chain
-                st.markdown("### 📈 Option Chain")
-                
-                # Create pivot view
-                pivot_df = _chain_processor.create_pivot_view(df)
-                
-                if not pivot_df.empty:
-                    # Style the dataframe
-                    st.dataframe(
-                        pivot_df,
-                        use_container_width=True,
-                        height=500
-                    )
-                    
-                    st.success(f"✅ Loaded {len(df)} strikes | {len(pivot_df)} rows displayed")
-                else:
-                    st.dataframe(df, use_container_width=True, height=500)
-                
-                # Export functionality
-                if export_data and not df.empty:
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        "📥 Download Chain Data (CSV)",
-                        data=csv,
-                        file_name=f"option_chain_{instrument}_{expiry}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-            
+                cached = _load_option_chain(client, inst_config, expiry)
             except Exception as e:
                 st.error(f"❌ Error fetching option chain: {str(e)}")
                 if st.session_state.get("debug_mode"):
                     st.exception(e)
+                return
+    if cached is None:
+        return
+    df, spot_price, views = cached
+
+    # Derived views live in the cached entry, keyed by strike range, and are
+    # filled only when rendered: reruns with the same range reuse them and a
+    # refetch starts from an empty dict.
+    view = views.get(filter_mode)
+    if view is None:
+        width = CHAIN_STRIKE_WIDTHS.get(filter_mode)
+        if width is not None:
+            df = _chain_processor.filter_by_strike_range(
+                df, center_strike=spot_price, strike_width=width
+            )
+        view = views[filter_mode] = {"df": df}
+    df = view["df"]
+    
+    # Display spot price
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.markdown(
+            f'<div class="info-box" style="text-align: center;">'
+            f'<strong>Spot Price:</strong> ₹{spot_price:,.2f}'
+            f'</div>',
+            unsafe_allow_html=True
+        )
+    
+    # Analytics dashboard
+    if show_analytics and not df.empty:
+        if "analytics" not in view:
+            view["analytics"] = _chain_processor.get_chain_analytics(df)
+        analytics = view["analytics"]
+        
+        st.markdown("### 📊 Chain Analytics")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("PCR", f"{analytics['pcr']:.2f}")
+        
+        with col2:
+            st.metric("Max Pain", f"₹{analytics['max_pain']:,.0f}")
+        
+        with col3:
+            st.metric("Call OI", f"{analytics['total_call_oi']:,.0f}")
+        
+        with col4:
+            st.metric("Put OI", f"{analytics['total_put_oi']:,.0f}")
+        
+        with col5:
+            st.metric("ATM Strike", f"₹{analytics['atm_strike']:,.0f}")
+    
+    # Display chain
+    st.markdown("### 📈 Option Chain")
+    
+    # Create pivot view
+    if "pivot" not in view:
+        view["pivot"] = _chain_processor.create_pivot_view(df)
+    pivot_df = view["pivot"]
+    
+    if not pivot_df.empty:
+        # Style the dataframe
+        st.dataframe(
+            pivot_df,
+            use_container_width=True,
+            height=500
+        )
+        
+        st.success(f"✅ Loaded {len(df)} strikes | {len(pivot_df)} rows displayed")
+    else:
+        st.dataframe(df, use_container_width=True, height=500)
+    
+    # Export functionality
+    if export_data and not df.empty:
+        if "csv" not in view:
+            view["csv"] = df.to_csv(index=False)
+        csv = view["csv"]
+        st.download_button(
+            "📥 Download Chain Data (CSV)",
+            data=csv,
+            file_name=f"option_chain_{instrument}_{expiry}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1042,8 +1133,8 @@ def show_positions():
         return
     
     # Calculate totals
-    total_pnl = sum(safe_float(p.get("pnl", 0)) for p in positions)
-    total_value = sum(safe_float(p.get("ltp", 0)) * safe_int(p.get("quantity", 0)) for p in positions)
+    totals = position_totals(positions)
+    total_pnl, total_value = totals["pnl"], totals["value"]
     
     # Summary cards
     col1, col2, col3, col4 = st.columns(4)
@@ -1244,10 +1335,7 @@ def show_analytics():
         funds = get_cached_funds(client)
         
         if positions and funds:
-            total_exposure = sum(
-                safe_float(p.get("ltp", 0)) * safe_int(p.get("quantity", 0))
-                for p in positions
-            )
+            total_exposure = position_totals(positions)["value"]
             
             available_margin = funds.get("available_margin", 0)
             total_margin = funds.get("total_balance", 0)
@@ -1464,14 +1552,13 @@ def show_square_off():
                             failed_count += 1
                     
                     if success_count > 0:
-                        st.success(f"✅ Successfully squared off {success_count} position(s)")
+                        Notifications.success(f"Successfully squared off {success_count} position(s)")
                     
                     if failed_count > 0:
-                        st.error(f"❌ Failed to square off {failed_count} position(s)")
+                        Notifications.error(f"Failed to square off {failed_count} position(s)")
                     
                     # Clear cache and refresh
                     CacheManager.clear("positions")
-                    time.sleep(1)
                     st.rerun()
 
 
@@ -6,7 +6,9 @@ Critical fixes from v7.0:
 2. Order idempotency prevents duplicate submissions
 3. Orders are NOT auto-retried (prevents double orders)
 4. get_spot_price() for accurate Greeks
-5. Thread-safe with API lock for background risk monitor
+5. Thread-safe for the background risk monitor: every call is paced by the
+   shared rate limiter; order book, margin and cancel/modify calls also hold
+   the API lock (quotes, positions, funds and new orders do not)
 """
 
 import logging
@@ -214,16 +216,16 @@ class BreezeAPIClient:
     @retry_api_call(max_attempts=3, initial_delay=0.5)
     def get_funds(self):
         self._require_connection()
-        with self._api_lock:
-            self.rate_limiter.wait()
-            return self._ok(self.breeze.get_funds())
+        # Read-only: paced by the rate limiter but not serialized on _api_lock
+        self.rate_limiter.wait()
+        return self._ok(self.breeze.get_funds())
 
     @retry_api_call(max_attempts=3, initial_delay=0.5)
     def get_positions(self):
         self._require_connection()
-        with self._api_lock:
-            self.rate_limiter.wait()
-            return self._ok(self.breeze.get_portfolio_positions())
+        # Read-only: paced by the rate limiter but not serialized on _api_lock
+        self.rate_limiter.wait()
+        return self._ok(self.breeze.get_portfolio_positions())
 
     @retry_api_call(max_attempts=3, initial_delay=1.0, backoff=1.5)
     def get_option_chain(self, stock_code: str, exchange: str, expiry: str):
@@ -242,35 +244,32 @@ class BreezeAPIClient:
     def get_quotes(self, stock_code: str, exchange: str, expiry: str,
                    strike: int, option_type: str):
         self._require_connection()
-        with self._api_lock:
-            self.rate_limiter.wait()
-            data = self.breeze.get_quotes(
-                stock_code=stock_code, exchange_code=exchange,
-                expiry_date=convert_to_breeze_date(expiry), product_type="options",
-                right="call" if option_type.upper() == "CE" else "put",
-                strike_price=str(strike)
-            )
+        # Read-only: paced by the rate limiter but not serialized on _api_lock
+        self.rate_limiter.wait()
+        data = self.breeze.get_quotes(
+            stock_code=stock_code, exchange_code=exchange,
+            expiry_date=convert_to_breeze_date(expiry), product_type="options",
+            right="call" if option_type.upper() == "CE" else "put",
+            strike_price=str(strike)
+        )
         return self._ok(data)
 
     @retry_api_call(max_attempts=2, initial_delay=0.5)
     def get_spot_price(self, stock_code: str, exchange: str):
         """Fetch underlying index spot price."""
         self._require_connection()
-        cfg = None
-        for name, c in C.INSTRUMENTS.items():
-            if c.api_code == stock_code:
-                cfg = c
-                break
+        cfg = C.get_instrument_by_api_code(stock_code)
         spot_code = cfg.spot_code if cfg and cfg.spot_code else stock_code
         spot_exchange = cfg.spot_exchange if cfg and cfg.spot_exchange else (
             "NSE" if exchange == "NFO" else "BSE"
         )
-        with self._api_lock:
-            self.rate_limiter.wait()
-            data = self.breeze.get_quotes(
-                stock_code=spot_code, exchange_code=spot_exchange,
-                product_type="cash", expiry_date="", right="", strike_price=""
-            )
+        # Read-only quote: paced by the rate limiter but not serialized on
+        # _api_lock, so several spot fetches can be in flight at once.
+        self.rate_limiter.wait()
+        data = self.breeze.get_quotes(
+            stock_code=spot_code, exchange_code=spot_exchange,
+            product_type="cash", expiry_date="", right="", strike_price=""
+        )
         return self._ok(data)
 
     @retry_api_call(max_attempts=2, initial_delay=0.5)
@@ -315,17 +314,20 @@ class BreezeAPIClient:
         try:
             right = "call" if option_type.upper() == "CE" else "put"
             log.info(f"ORDER: {action.upper()} {stock_code} {strike} {option_type} x{quantity}")
-            with self._api_lock:
-                self.rate_limiter.wait()
-                resp = self.breeze.place_order(
-                    stock_code=stock_code, exchange_code=exchange, product="options",
-                    action=action.lower(), order_type=order_type.lower(),
-                    quantity=str(quantity),
-                    price=str(price) if order_type.lower() == "limit" else "",
-                    validity="day", validity_date="", disclosed_quantity="", stoploss="",
-                    expiry_date=convert_to_breeze_date(expiry), right=right,
-                    strike_price=str(strike)
-                )
+            # Orders are paced by the rate limiter but not serialized on
+            # _api_lock, so a bulk square-off overlaps its round-trips. The
+            # idempotency key only covers the current minute; callers guard
+            # repeat clicks with session_state._order_in_progress.
+            self.rate_limiter.wait()
+            resp = self.breeze.place_order(
+                stock_code=stock_code, exchange_code=exchange, product="options",
+                action=action.lower(), order_type=order_type.lower(),
+                quantity=str(quantity),
+                price=str(price) if order_type.lower() == "limit" else "",
+                validity="day", validity_date="", disclosed_quantity="", stoploss="",
+                expiry_date=convert_to_breeze_date(expiry), right=right,
+                strike_price=str(strike)
+            )
             return self._ok(resp)
         except Exception as e:
             self.idempotency.release(idem_key)
@@ -593,16 +593,17 @@ class CompleteBreezeClient:
         if cached:
             return self._ok(cached)
         
-        with self._api_lock:
-            self.rate_limiter.wait_for_token()
-            data = self.breeze.get_quotes(
-                stock_code=stock_code,
-                exchange_code=exchange,
-                product_type=product_type,
-                expiry_date=to_breeze_date(expiry_date) if expiry_date else "",
-                strike_price=str(strike_price) if strike_price else "",
-                right=right.lower() if right else ""
-            )
+        # Read-only: paced by the token bucket but not serialized on _api_lock,
+        # so a quote can be in flight alongside a chain fetch.
+        self.rate_limiter.wait_for_token()
+        data = self.breeze.get_quotes(
+            stock_code=stock_code,
+            exchange_code=exchange,
+            product_type=product_type,
+            expiry_date=to_breeze_date(expiry_date) if expiry_date else "",
+            strike_price=str(strike_price) if strike_price else "",
+            right=right.lower() if right else ""
+        )
         
         self._set_cached(cache_key, data)
         return self._ok(data)
@@ -683,11 +684,7 @@ class CompleteBreezeClient:
             Spot price data
         """
         # Map to spot equivalent if needed
-        cfg = None
-        for name, c in C.INSTRUMENTS.items():
-            if c.api_code == stock_code:
-                cfg = c
-                break
+        cfg = C.get_instrument_by_api_code(stock_code)
         
         spot_code = cfg.spot_code if cfg and cfg.spot_code else stock_code
         spot_exchange = cfg.spot_exchange if cfg and cfg.spot_exchange else exchange
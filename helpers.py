@@ -6,11 +6,14 @@ Imports analytics for Greek calculations on chain data.
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
 import logging
 
 import app_config as C
-from analytics import calculate_greeks, estimate_implied_volatility
+from analytics import (
+    calculate_greeks_vec, estimate_implied_volatility, GREEK_DECIMALS
+)
 
 log = logging.getLogger(__name__)
 
@@ -47,10 +50,56 @@ def safe_str(value: Any, default: str = "") -> str:
     return str(value).strip()
 
 
+def numeric_column(df: pd.DataFrame, col: str, default: float = 0.0) -> pd.Series:
+    """Column-wise safe_float: strips thousands separators, bad/missing → default."""
+    if col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=float)
+    s = df[col]
+    if not pd.api.types.is_numeric_dtype(s):  # object or pandas>=3 str dtype
+        s = s.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(s, errors='coerce').fillna(default)
+
+
+def lower_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """Column-wise safe_str().lower(); missing column/values → ""."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str).str.strip().str.lower()
+
+
 # ═══════════════════════════════════════════════════════════════
 # API RESPONSE PARSER
 # ═══════════════════════════════════════════════════════════════
 
+def _success_payload(raw_response: Dict[str, Any]):
+    data = raw_response.get("data", {})
+    return data, (data.get("Success") if isinstance(data, dict) else None)
+
+
+def response_data(raw_response: Dict[str, Any]) -> Dict:
+    """The response's single record (APIResponse.data) without building a wrapper."""
+    if not raw_response.get("success", False):
+        return {}
+    data, success_data = _success_payload(raw_response)
+    if isinstance(success_data, dict):
+        return success_data
+    if isinstance(success_data, list) and success_data:
+        return success_data[0] if isinstance(success_data[0], dict) else {}
+    return data if isinstance(data, dict) else {}
+
+
+def response_items(raw_response: Dict[str, Any]) -> List[Dict]:
+    """The response's record list (APIResponse.items) without building a wrapper."""
+    if not raw_response.get("success", False):
+        return []
+    _, success_data = _success_payload(raw_response)
+    if isinstance(success_data, list):
+        return [i for i in success_data if isinstance(i, dict)]
+    if isinstance(success_data, dict):
+        return [success_data]
+    return []
+
+
 class APIResponse:
     """Parse ICICI Breeze response into clean accessors."""
 
@@ -58,30 +107,14 @@ class APIResponse:
         self.raw = raw_response
         self.success = raw_response.get("success", False)
         self.message = raw_response.get("message", "")
-        self._data = raw_response.get("data", {})
-        self._success_data = (
-            self._data.get("Success") if isinstance(self._data, dict) else None
-        )
 
     @property
     def data(self) -> Dict:
-        if not self.success:
-            return {}
-        if isinstance(self._success_data, dict):
-            return self._success_data
-        if isinstance(self._success_data, list) and self._success_data:
-            return self._success_data[0] if isinstance(self._success_data[0], dict) else {}
-        return self._data if isinstance(self._data, dict) else {}
+        return response_data(self.raw)
 
     @property
     def items(self) -> List[Dict]:
-        if not self.success:
-            return []
-        if isinstance(self._success_data, list):
-            return [i for i in self._success_data if isinstance(i, dict)]
-        if isinstance(self._success_data, dict):
-            return [self._success_data]
-        return []
+        return response_items(self.raw)
 
     def get(self, key, default=None):
         return self.data.get(key, default)
@@ -92,8 +125,7 @@ class APIResponse:
 # ═══════════════════════════════════════════════════════════════
 
 def parse_funds(response: Dict) -> Dict[str, float]:
-    parsed = APIResponse(response)
-    d = parsed.data
+    d = response_data(response)
     return {
         "total_balance": safe_float(d.get("total_bank_balance", 0)),
         "allocated_equity": safe_float(d.get("allocated_equity", 0)),
@@ -109,6 +141,9 @@ def parse_funds(response: Dict) -> Dict[str, float]:
 # ═══════════════════════════════════════════════════════════════
 
 def detect_position_type(position: Dict) -> str:
+    side = position.get("side")
+    if side in ("short", "long"):
+        return side
     action = safe_str(position.get("action")).lower()
     if action == "sell":
         return "short"
@@ -132,6 +167,60 @@ def detect_position_type(position: Dict) -> str:
     return "long"
 
 
+def detect_position_types(df: pd.DataFrame) -> np.ndarray:
+    """detect_position_type() over a positions DataFrame, same precedence, no row loop."""
+    if "side" in df.columns and df["side"].isin(("short", "long")).all():
+        return df["side"].to_numpy(dtype=str)
+    action = lower_column(df, "action")
+    pos_type = lower_column(df, "position_type")
+    segment = lower_column(df, "segment")
+    sell_q = numeric_column(df, "sell_quantity").astype(int)
+    buy_q = numeric_column(df, "buy_quantity").astype(int)
+    qty = numeric_column(df, "quantity").astype(int)
+    conditions = [
+        action.eq("sell"), action.eq("buy"),
+        pos_type.str.contains("short|sell"), pos_type.str.contains("long|buy"),
+        segment.str.contains("short|sell"), segment.str.contains("long|buy"),
+        sell_q > buy_q, buy_q > sell_q,
+        qty < 0,
+    ]
+    choices = ["short", "long"] * 4 + ["short"]
+    return np.select(conditions, choices, default="long")
+
+
+def normalize_positions(positions: List[Dict]) -> List[Dict]:
+    """
+    Derive each position's side ("short"/"long", detect_position_type
+    precedence) and unsigned quantity once, in place, so cached dicts
+    carry them as "side" and "abs_qty".
+    """
+    if not positions:
+        return positions
+    df = pd.DataFrame(positions)
+    sides = detect_position_types(df)
+    abs_qty = numeric_column(df, "quantity").astype(int).abs().to_numpy()
+    for p, side, q in zip(positions, sides, abs_qty):
+        p["side"] = str(side)
+        p["abs_qty"] = int(q)
+    return positions
+
+
+def position_totals(positions: Union[List[Dict], pd.DataFrame]) -> Dict[str, float]:
+    """
+    Portfolio sums in one column-wise pass: "pnl" = Σ pnl and
+    "value" = Σ ltp × quantity (signed, quantity truncated like safe_int).
+    Accepts the raw position list or a DataFrame the caller already built.
+    """
+    df = positions if isinstance(positions, pd.DataFrame) else pd.DataFrame(positions)
+    if df.empty:
+        return {"pnl": 0.0, "value": 0.0}
+    qty = numeric_column(df, "quantity").astype(int).to_numpy()
+    return {
+        "pnl": float(numeric_column(df, "pnl").to_numpy().sum()),
+        "value": float((numeric_column(df, "ltp").to_numpy() * qty).sum()),
+    }
+
+
 def get_closing_action(position_type: str) -> str:
     return "buy" if position_type == "short" else "sell"
 
@@ -180,16 +269,19 @@ def create_pivot_table(df: pd.DataFrame) -> pd.DataFrame:
     available = {k: v for k, v in pivot_fields.items() if k in df.columns}
     if not available:
         return df
-    calls = df[df["right"] == "Call"].set_index("strike_price")
-    puts = df[df["right"] == "Put"].set_index("strike_price")
-    all_strikes = sorted(df["strike_price"].dropna().unique())
-    result = pd.DataFrame({"Strike": all_strikes}).set_index("Strike")
-    for field, label in available.items():
-        if field in calls.columns:
-            result[f"C_{label}"] = calls[field]
-        if field in puts.columns:
-            result[f"P_{label}"] = puts[field]
-    result = result.fillna(0).reset_index()
+    # One reshape: (strike × right) for every field, then flatten the labels
+    wide = df.pivot_table(
+        index="strike_price", columns="right",
+        values=list(available), aggfunc="first"
+    )
+    cols = [(f, r) for r in ("Call", "Put") for f in available]
+    wide = wide.reindex(
+        index=sorted(df["strike_price"].dropna().unique()),
+        columns=pd.MultiIndex.from_tuples(cols)
+    ).fillna(0)
+    wide.columns = [f"{'C' if r == 'Call' else 'P'}_{available[f]}" for f, r in cols]
+    wide.index.name = "Strike"
+    result = wide.reset_index()
     call_cols = [c for c in result.columns if c.startswith("C_")]
     put_cols = [c for c in result.columns if c.startswith("P_")]
     return result[call_cols + ["Strike"] + put_cols]
@@ -244,30 +336,43 @@ def add_greeks_to_chain(df: pd.DataFrame, spot_price: float,
         tte = max((expiry - datetime.now(C.IST).replace(tzinfo=None)).days / C.DAYS_PER_YEAR, 0.001)
     except Exception:
         tte = 0.05
-    greeks_list = []
-    for _, row in df.iterrows():
-        strike = row.get("strike_price", 0)
-        ot = C.normalize_option_type(row.get("right"))
-        ltp = row.get("ltp", 0)
-        if ot in ("CE", "PE") and strike > 0 and spot_price > 0 and ltp > 0:
-            try:
-                iv_raw = row.get("iv", 0)
-                iv = iv_raw / 100 if iv_raw > 1 else (
-                    estimate_implied_volatility(ltp, spot_price, strike, tte, ot)
-                    if iv_raw <= 0 else iv_raw
-                )
-                greeks_list.append(calculate_greeks(spot_price, strike, tte, iv, ot))
-            except Exception:
-                greeks_list.append({'delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0, 'rho': 0})
-        else:
-            greeks_list.append({'delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0, 'rho': 0})
-    return pd.concat([df.reset_index(drop=True), pd.DataFrame(greeks_list)], axis=1)
+    strike = numeric_column(df, "strike_price").to_numpy()
+    ltp = numeric_column(df, "ltp").to_numpy()
+    iv_raw = numeric_column(df, "iv").to_numpy()
+    ot = (df["right"].map(C.normalize_option_type) if "right" in df.columns
+          else pd.Series("N/A", index=df.index)).to_numpy()
+    valid = np.isin(ot, ("CE", "PE")) & (strike > 0) & (spot_price > 0) & (ltp > 0)
+
+    # Broker IV is in percent; only rows without one need solving
+    iv = np.where(iv_raw > 1, iv_raw / 100, iv_raw)
+    need = valid & (iv_raw <= 0)
+    if need.any():
+        iv[need] = estimate_implied_volatility(ltp[need], spot_price, strike[need], tte, ot[need])
+
+    greeks = calculate_greeks_vec(spot_price, strike, tte, iv, ot == "CE")
+    greeks_df = pd.DataFrame(
+        {k: np.nan_to_num(np.where(valid, v, 0.0)) for k, v in greeks.items()}
+    ).round(GREEK_DECIMALS)
+    return pd.concat([df.reset_index(drop=True), greeks_df], axis=1)
 
 
 # ═══════════════════════════════════════════════════════════════
 # FORMATTING
 # ═══════════════════════════════════════════════════════════════
 
+@lru_cache(maxsize=1)
+def instruments_table() -> pd.DataFrame:
+    """Static instrument overview; built once per process. Treat as read-only."""
+    return pd.DataFrame([
+        {
+            "Name": n, "Desc": c.description,
+            "Exchange": c.exchange, "Lot": c.lot_size,
+            "Gap": c.strike_gap
+        }
+        for n, c in C.INSTRUMENTS.items()
+    ])
+
+
 def get_market_status() -> str:
     now = datetime.now(C.IST)
     if now.weekday() >= 5:
@@ -297,6 +402,7 @@ def format_currency(value: float) -> str:
     return f"{sign}₹{av:.2f}"
 
 
+@lru_cache(maxsize=256)
 def format_expiry(date_str: str) -> str:
     for fmt in ["%Y-%m-%d", "%d-%b-%Y", "%d-%B-%Y"]:
         try:
@@ -306,13 +412,33 @@ def format_expiry(date_str: str) -> str:
     return date_str
 
 
-def calculate_days_to_expiry(expiry_date: str) -> int:
-    if not expiry_date:
-        return 0
+def expiry_to_iso(date_str: str) -> str:
+    """Breeze expiry in any of its formats → YYYY-MM-DD (cache-key form)."""
+    s = safe_str(date_str)
+    for fmt, text in (("%Y-%m-%d", s[:10]), ("%d-%b-%Y", s), ("%d-%B-%Y", s)):
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return s
+
+
+@lru_cache(maxsize=32)
+def _parse_expiry(expiry_date: str) -> Optional[datetime]:
+    """Expiry string → midnight datetime. Only the parse is cached, not the day count."""
+    text = expiry_date.strip()[:10]
     for fmt in ["%Y-%m-%d", "%d-%b-%Y", "%d-%B-%Y", "%Y-%m-%dT%H:%M:%S"]:
         try:
-            expiry = datetime.strptime(expiry_date.strip()[:10], fmt[:len(expiry_date.strip()[:10])])
-            return max(0, (expiry - datetime.now(C.IST).replace(tzinfo=None)).days)
+            return datetime.strptime(text, fmt[:len(text)])
         except ValueError:
             continue
-    return 0
+    return None
+
+
+def calculate_days_to_expiry(expiry_date: str) -> int:
+    if not expiry_date:
+        return 0
+    expiry = _parse_expiry(expiry_date)
+    if expiry is None:
+        return 0
+    return max(0, (expiry - datetime.now(C.IST).replace(tzinfo=None)).days)
@@ -0,0 +1,281 @@
+"""
+IV Kernel — compiled Black-Scholes pricing and Newton-Raphson IV loop.
+Pure math. Numba is optional: without it the same functions run as
+plain Python, so callers never need to check which path is active.
+
+Option type is passed as a bool (is_call); convert "CE"/"PE" once at
+the Python boundary in analytics.py.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit when numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+# Newton status codes returned by _newton_iv_nb
+NR_CONVERGED = 0
+NR_VEGA_COLLAPSE = 1
+NR_MAX_ITER = 2
+NR_INVALID = 3
+NR_SUB_INTRINSIC = 4
+NR_LB_EXACT = 5
+
+# Lowest vol the solver returns, and the time value (₹, under half a 0.05
+# tick) below which an in-the-money quote is pure intrinsic: the floor
+# already reproduces it and Newton is skipped. OTM quotes are all time
+# value, so they always go to the solver however small they are.
+IV_FLOOR = 0.001
+LB_EXACT_TOL = 0.025
+
+# Fast-math for the IV solver minus the no-NaN/no-Inf assumptions ('nnan',
+# 'ninf'): the solver takes unvalidated quotes and returns math.inf errors,
+# so NaN/Inf checks must survive compilation.
+_SOLVER_FASTMATH = {'contract', 'arcp', 'afn'}
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH, inline='always')
+def _ncdf_nb(x):
+    """
+    Normal CDF, Abramowitz-Stegun 26.2.17: one exp and a degree-5
+    polynomial in t = 1/(1 + 0.2316419|x|). Max abs error 7.5e-8.
+    """
+    ax = abs(x)
+    t = 1.0 / (1.0 + 0.2316419 * ax)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937
+           + t * (-1.821255978 + t * 1.330274429))))
+    tail = _INV_SQRT_2PI * math.exp(-0.5 * ax * ax) * poly
+    return tail if x < 0.0 else 1.0 - tail
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _npdf_nb(x):
+    return _INV_SQRT_2PI * math.exp(-0.5 * x * x)
+
+
+# ── Loop-invariant cores ─────────────────────────────────────
+# For a fixed contract only vol changes between Newton iterations, so
+# disc = e^(-rT), log(S/K), sqrt(T) and rT are computed once by the caller.
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _d1_d2_core_nb(log_sk, sqrt_t, rt, vol):
+    if sqrt_t < 1e-5 or vol < 1e-10:
+        if log_sk > 0.0:
+            return 10.0, 10.0
+        elif log_sk < 0.0:
+            return -10.0, -10.0
+        return 0.0, 0.0
+    vol_t = vol * sqrt_t
+    d1 = (log_sk + rt + 0.5 * vol_t * vol_t) / vol_t
+    d2 = d1 - vol_t
+    return min(max(d1, -10.0), 10.0), min(max(d2, -10.0), 10.0)
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _bs_price_vega_core_nb(spot, strike, log_sk, sqrt_t, disc, rt, vol, is_call):
+    """Price and raw vega from a single d1/d2 evaluation (one Newton step)."""
+    d1, d2 = _d1_d2_core_nb(log_sk, sqrt_t, rt, vol)
+    if is_call:
+        price = max(0.0, spot * _ncdf_nb(d1) - strike * disc * _ncdf_nb(d2))
+    else:
+        price = max(0.0, strike * disc * _ncdf_nb(-d2) - spot * _ncdf_nb(-d1))
+    vega = spot * _npdf_nb(d1) * sqrt_t if sqrt_t >= 1e-5 else 0.0
+    return price, vega
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _newton_iv_from_nb(target, spot, strike, tte, is_call, r, vol, max_iter, tol):
+    """
+    Bracketed Newton-Raphson IV from a given starting vol. Price rises with
+    vol, so every evaluation tightens [lo, hi] around the root; when vega
+    vanishes or the Newton step leaves the bracket, bisect instead.
+    Returns (vol, status, iterations, abs_price_error).
+    """
+    rt = r * tte
+    disc = math.exp(-rt)
+    log_sk = math.log(spot / strike)
+    sqrt_t = math.sqrt(tte)
+
+    lo, hi = IV_FLOOR, 5.0
+    diff = 0.0
+    for i in range(max_iter):
+        price, vega = _bs_price_vega_core_nb(
+            spot, strike, log_sk, sqrt_t, disc, rt, vol, is_call)
+        diff = price - target
+        if abs(diff) < tol:
+            return vol, NR_CONVERGED, i + 1, abs(diff)
+        if diff > 0.0:
+            hi = vol
+        else:
+            lo = vol
+        vol_new = 0.5 * (lo + hi)
+        if vega >= 1e-12:
+            step = diff / vega
+            if abs(step) > vol * 0.5:
+                step = math.copysign(vol * 0.5, step)
+            if lo < vol - step < hi:
+                vol_new = vol - step
+        if abs(vol_new - vol) < 1e-10:
+            return vol_new, NR_CONVERGED, i + 1, abs(diff)
+        vol = vol_new
+
+    return vol, NR_MAX_ITER, max_iter, abs(diff)
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _newton_iv_nb(target, spot, strike, tte, is_call, r, max_iter, tol):
+    """
+    Newton-Raphson IV started from max(sigma_c, sigma_bs / 2).
+    sigma_c = sqrt(|2·ln(K/F)/T + 2r|) is the vomma-zero inflection point,
+    from which Newton converges monotonically; it is exact at the money
+    and far better than Brenner-Subrahmanyam for OTM strikes.
+    """
+    # ln(K/F) + rT == ln(K/S) with F = S·e^(rT)
+    sigma_c = math.sqrt(abs(2.0 / tte * math.log(strike / spot)))
+    sigma_bs = math.sqrt(2.0 * math.pi / tte) * (target / spot)
+    vol = min(max(max(sigma_c, 0.5 * sigma_bs), 0.01), 3.0)
+    return _newton_iv_from_nb(target, spot, strike, tte, is_call, r, vol, max_iter, tol)
+
+
+@njit(cache=True, fastmath=_SOLVER_FASTMATH)
+def _solve_iv_nb(target, spot, strike, tte, is_call, r, max_iter, tol):
+    """
+    Guarded scalar IV. If the first Newton pass fails, restart once from a
+    second initial guess before giving up to the Python Brent fallback.
+    """
+    if not (math.isfinite(target) and math.isfinite(spot)
+            and math.isfinite(strike) and math.isfinite(tte)):
+        return 0.20, NR_INVALID, 0, math.inf
+    if target <= 0.0 or spot <= 0.0 or strike <= 0.0 or tte <= 0.0:
+        return 0.20, NR_INVALID, 0, math.inf
+    disc = math.exp(-r * tte)
+    if is_call:
+        intrinsic = max(0.0, spot - strike * disc)
+    else:
+        intrinsic = max(0.0, strike * disc - spot)
+    if target < intrinsic * 0.99:
+        return 0.01, NR_SUB_INTRINSIC, 0, abs(target - intrinsic)
+    if intrinsic > 0.0 and target - intrinsic < LB_EXACT_TOL:
+        return IV_FLOOR, NR_LB_EXACT, 0, abs(target - intrinsic)
+
+    vol, status, iters, diff = _newton_iv_nb(
+        target, spot, strike, tte, is_call, r, max_iter, tol)
+    if status != NR_CONVERGED:
+        # Retry once from the Brenner-Subrahmanyam ATM approximation
+        sigma_bs = math.sqrt(2.0 * math.pi / tte) * (target / spot)
+        vol2, status2, iters2, diff2 = _newton_iv_from_nb(
+            target, spot, strike, tte, is_call, r,
+            min(max(sigma_bs, 0.01), 3.0), max_iter, tol)
+        iters += iters2
+        if status2 == NR_CONVERGED or diff2 < diff:
+            vol, status, diff = vol2, status2, diff2
+    return vol, status, iters, diff
+
+
+@njit(parallel=True, cache=True, fastmath=_SOLVER_FASTMATH)
+def _solve_iv_batch_nb(prices, spots, strikes, ttes, is_call, r, max_iter, tol):
+    """Solve IV for every row in parallel. Returns (iv, status, iterations, error)."""
+    n = prices.shape[0]
+    out_iv = np.empty(n)
+    out_status = np.empty(n, dtype=np.int64)
+    out_iters = np.empty(n, dtype=np.int64)
+    out_err = np.empty(n)
+    for i in prange(n):
+        v, st, it, err = _solve_iv_nb(
+            prices[i], spots[i], strikes[i], ttes[i], is_call[i], r, max_iter, tol)
+        out_iv[i] = v
+        out_status[i] = st
+        out_iters[i] = it
+        out_err[i] = err
+    return out_iv, out_status, out_iters, out_err
+
+
+_SQRT2 = math.sqrt(2.0)
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _chain_greeks_nb(spots, strikes, ttes, vols, is_call, r, days_per_year):
+    """
+    Delta, gamma, theta (daily), vega and rho (per 1%) for every row in one
+    parallel pass; same units and edge cases as analytics.calculate_greeks_vec.
+    The normal CDF is erf-based here, not the A&S 26.2.17 polynomial: Greeks
+    are displayed to 6 decimals, the IV solve only needs price accuracy.
+    """
+    n = spots.shape[0]
+    delta = np.empty(n)
+    gamma = np.empty(n)
+    theta = np.empty(n)
+    vega = np.empty(n)
+    rho = np.empty(n)
+    for i in prange(n):
+        s, k, t, v, call = spots[i], strikes[i], ttes[i], vols[i], is_call[i]
+        if t < 1e-10:
+            if call:
+                delta[i] = 1.0 if s > k else 0.0
+            else:
+                delta[i] = -1.0 if s < k else 0.0
+            gamma[i] = 0.0
+            theta[i] = 0.0
+            vega[i] = 0.0
+            rho[i] = 0.0
+            continue
+        sqrt_t = math.sqrt(t)
+        vol_t = v * sqrt_t
+        if v < 1e-10 or s <= 0.0 or k <= 0.0:
+            d1 = 10.0 if s > k else (-10.0 if s < k else 0.0)
+            d2 = d1
+        else:
+            d1 = (math.log(s / k) + (r + 0.5 * v * v) * t) / vol_t
+            d2 = min(max(d1 - vol_t, -10.0), 10.0)
+            d1 = min(max(d1, -10.0), 10.0)
+        n_d1 = _INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+        cdf_d1 = 0.5 * (1.0 + math.erf(d1 / _SQRT2))
+        cdf_d2 = 0.5 * (1.0 + math.erf(d2 / _SQRT2))
+        k_disc = k * math.exp(-r * t)
+        decay = -s * n_d1 * v / (2.0 * sqrt_t)
+        denom = s * vol_t
+        gamma[i] = n_d1 / denom if denom > 0.0 else 0.0
+        vega[i] = s * n_d1 * sqrt_t / 100.0
+        if call:
+            delta[i] = cdf_d1
+            theta[i] = (decay - r * k_disc * cdf_d2) / days_per_year
+            rho[i] = k_disc * t * cdf_d2 / 100.0
+        else:
+            delta[i] = cdf_d1 - 1.0
+            theta[i] = (decay + r * k_disc * (1.0 - cdf_d2)) / days_per_year
+            rho[i] = -k_disc * t * (1.0 - cdf_d2) / 100.0
+    return delta, gamma, theta, vega, rho
+
+
+def _warmup():
+    """Compile (or load from cache) the kernels so the first user click is fast."""
+    try:
+        _newton_iv_nb(2.0, 100.0, 100.0, 0.1, True, 0.065, 2, 1e-8)
+        one = np.ones(1)
+        _solve_iv_batch_nb(one * 2.0, one * 100.0, one * 100.0, one * 0.1,
+                           np.ones(1, dtype=np.bool_), 0.065, 2, 1e-8)
+        _chain_greeks_nb(one * 100.0, one * 100.0, one * 0.1, one * 0.2,
+                         np.ones(1, dtype=np.bool_), 0.065, 365.0)
+    except Exception as e:
+        log.warning(f"IV kernel warm-up failed: {e}")
+
+
+if NUMBA_AVAILABLE:
+    _warmup()
@@ -10,7 +10,7 @@ from datetime import datetime
 import logging
 
 import app_config as C
-from analytics import calculate_greeks, estimate_implied_volatility
+from analytics import calculate_greeks_vec, estimate_implied_volatility, GREEK_DECIMALS
 
 log = logging.getLogger(__name__)
 
@@ -145,58 +145,35 @@ class OptionChainProcessor:
             log.warning(f"Could not calculate time to expiry: {e}")
             tte = 0.05
         
-        greeks_list = []
-        
-        for idx, row in df.iterrows():
-            strike = row.get('strike_price', 0)
-            option_type = C.normalize_option_type(row.get('right'))
-            ltp = row.get('ltp', 0)
-            
-            if option_type in ('CE', 'PE') and strike > 0 and spot_price > 0:
-                try:
-                    # Get or estimate IV
-                    iv_raw = row.get('iv', 0)
-                    if iv_raw > 1:  # Percentage format
-                        iv = iv_raw / 100
-                    elif iv_raw > 0:
-                        iv = iv_raw
-                    else:
-                        # Estimate IV from LTP
-                        if ltp > 0:
-                            iv = estimate_implied_volatility(
-                                ltp, spot_price, strike, tte, option_type
-                            )
-                        else:
-                            iv = 0.20  # Default
-                    
-                    # Calculate Greeks
-                    greeks = calculate_greeks(
-                        spot_price, strike, tte, iv, option_type
-                    )
-                    greeks_list.append(greeks)
-                    
-                except Exception as e:
-                    log.debug(f"Greeks calculation failed for strike {strike}: {e}")
-                    greeks_list.append({
-                        'delta': 0, 'gamma': 0, 'theta': 0,
-                        'vega': 0, 'rho': 0
-                    })
-            else:
-                greeks_list.append({
-                    'delta': 0, 'gamma': 0, 'theta': 0,
-                    'vega': 0, 'rho': 0
-                })
-        
-        # Add Greeks columns
-        greeks_df = pd.DataFrame(greeks_list)
-        
+        # Column arrays in, column arrays out: one batch IV solve for the
+        # rows without a broker IV, then one vectorized Greeks pass
+        n = len(df)
+        strike = df['strike_price'].to_numpy(dtype=np.float64)
+        ltp = df['ltp'].to_numpy(dtype=np.float64) if 'ltp' in df.columns else np.zeros(n)
+        iv_raw = df['iv'].to_numpy(dtype=np.float64) if 'iv' in df.columns else np.zeros(n)
+        ot = (df['right'].map(C.normalize_option_type).to_numpy() if 'right' in df.columns
+              else np.full(n, 'N/A'))
+        valid = np.isin(ot, ('CE', 'PE')) & (strike > 0)
+
+        # Broker IV > 1 is in percent; no IV and no LTP → 20% default
+        iv = np.where(iv_raw > 1, iv_raw / 100, np.where(iv_raw > 0, iv_raw, 0.20))
+        need = valid & (iv_raw <= 0) & (ltp > 0)
+        if need.any():
+            iv[need] = estimate_implied_volatility(
+                ltp[need], spot_price, strike[need], tte, ot[need]
+            )
+
+        greeks = calculate_greeks_vec(spot_price, strike, tte, iv, ot == 'CE')
+
         # Only add columns that don't exist
-        for col in greeks_df.columns:
+        for col, values in greeks.items():
             if col not in df.columns:
-                df[col] = greeks_df[col]
-        
+                df[col] = np.round(
+                    np.where(valid, np.nan_to_num(values), 0.0), GREEK_DECIMALS[col]
+                )
+
         return df
-    
+
     def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Add useful derived columns to DataFrame.
@@ -303,6 +280,40 @@ class OptionChainProcessor:
         
         return result[call_cols + ['Strike'] + put_cols]
     
+    @staticmethod
+    def _strike_window(
+        df: pd.DataFrame,
+        center_strike: float,
+        num_strikes: int
+    ) -> pd.DataFrame:
+        """
+        Rows whose strike is within num_strikes listed strikes of the one
+        closest to center_strike (ties go to the lower strike).
+        """
+        if df.empty or 'strike_price' not in df.columns:
+            return df
+
+        strike_col = df['strike_price'].to_numpy(dtype=np.float64)
+        strikes = np.unique(strike_col)  # sorted
+        if len(strikes) == 0:
+            return df
+
+        # Closest listed strike by binary search instead of a scan
+        i = int(np.searchsorted(strikes, center_strike))
+        if i == len(strikes) or (
+            i > 0 and center_strike - strikes[i - 1] <= strikes[i] - center_strike
+        ):
+            i -= 1
+        lo = strikes[max(0, i - num_strikes)]
+        hi = strikes[min(len(strikes) - 1, i + num_strikes)]
+
+        # process_raw_chain sorts by strike, so the window is one contiguous slice
+        if df['strike_price'].is_monotonic_increasing:
+            start = int(np.searchsorted(strike_col, lo, side='left'))
+            stop = int(np.searchsorted(strike_col, hi, side='right'))
+            return df.iloc[start:stop].copy()
+        return df[(strike_col >= lo) & (strike_col <= hi)].copy()
+
     def filter_around_atm(
         self,
         df: pd.DataFrame,
@@ -320,27 +331,26 @@ class OptionChainProcessor:
         Returns:
             Filtered DataFrame
         """
-        if df.empty or 'strike_price' not in df.columns:
-            return df
-        
-        strikes = sorted(df['strike_price'].unique())
-        
-        if not strikes:
-            return df
-        
-        # Find closest strike to ATM
-        atm_idx = min(
-            range(len(strikes)),
-            key=lambda i: abs(strikes[i] - atm_strike)
-        )
-        
-        # Get range
-        start_idx = max(0, atm_idx - num_strikes)
-        end_idx = min(len(strikes), atm_idx + num_strikes + 1)
-        
-        selected_strikes = strikes[start_idx:end_idx]
+        return self._strike_window(df, atm_strike, num_strikes)
+
+    def filter_by_strike_range(
+        self,
+        df: pd.DataFrame,
+        center_strike: float,
+        strike_width: int = 10
+    ) -> pd.DataFrame:
+        """
+        Filter option chain to strike_width strikes either side of center_strike.
         
-        return df[df['strike_price'].isin(selected_strikes)].copy()
+        Args:
+            df: Complete option chain
+            center_strike: Price to center on (usually spot)
+            strike_width: Number of strikes on each side
+            
+        Returns:
+            Filtered DataFrame
+        """
+        return self._strike_window(df, center_strike, strike_width)
     
     def calculate_metrics(self, df: pd.DataFrame) -> Dict[str, float]:
         """
@@ -389,29 +399,24 @@ class OptionChainProcessor:
     
     def _calculate_max_pain(self, df: pd.DataFrame) -> float:
         """Calculate max pain strike."""
-        strikes = df['strike_price'].unique()
+        strike_col = df['strike_price'].to_numpy(dtype=np.float64)
+        strikes = np.unique(strike_col)
         
         if len(strikes) == 0:
             return 0
         
-        pain = {}
+        right = df['right'].to_numpy()
+        oi = df['open_interest'].to_numpy(dtype=np.float64)
+        is_call = right == 'Call'
+        is_put = right == 'Put'
         
-        for strike in strikes:
-            # Call pain: all calls ITM
-            call_pain = (
-                (strike - df[(df['right'] == 'Call') & (df['strike_price'] < strike)]['strike_price']) *
-                df[(df['right'] == 'Call') & (df['strike_price'] < strike)]['open_interest']
-            ).sum()
-            
-            # Put pain: all puts ITM  
-            put_pain = (
-                (df[(df['right'] == 'Put') & (df['strike_price'] > strike)]['strike_price'] - strike) *
-                df[(df['right'] == 'Put') & (df['strike_price'] > strike)]['open_interest']
-            ).sum()
-            
-            pain[strike] = call_pain + put_pain
+        # Writers' payout at each candidate expiry strike (rows) summed over
+        # every contract (columns): ITM calls pay K - k, ITM puts pay k - K
+        diff = strikes[:, None] - strike_col[None, :]
+        pain = (np.clip(diff, 0, None) * (oi * is_call)).sum(axis=1)
+        pain += (np.clip(-diff, 0, None) * (oi * is_put)).sum(axis=1)
         
-        return float(min(pain, key=pain.get)) if pain else 0
+        return float(strikes[np.argmin(pain)])
     
     def _estimate_atm(self, df: pd.DataFrame) -> float:
         """Estimate ATM strike from option prices."""
@@ -430,6 +435,25 @@ class OptionChainProcessor:
         
         return float(combined['diff'].idxmin())
     
+    def get_chain_analytics(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Headline chain analytics for the option chain page.
+        
+        Args:
+            df: Option chain DataFrame
+            
+        Returns:
+            Dict with pcr, max_pain, total_call_oi, total_put_oi, atm_strike
+        """
+        metrics = self.calculate_metrics(df)
+        return {
+            'pcr': metrics.get('pcr', 0),
+            'max_pain': metrics.get('max_pain', 0),
+            'total_call_oi': metrics.get('call_oi_total', 0),
+            'total_put_oi': metrics.get('put_oi_total', 0),
+            'atm_strike': metrics.get('atm_strike', 0),
+        }
+    
     def get_most_active_strikes(
         self,
         df: pd.DataFrame,
@@ -6,18 +6,25 @@ Zero dependencies on Streamlit or other app modules.
 
 import sqlite3
 import json
+import queue
+import atexit
 import threading
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from contextlib import contextmanager
 
 log = logging.getLogger(__name__)
 
 DB_PATH = Path("data/breeze_trader.db")
 
+# Background writer: commit up to this many queued inserts per transaction,
+# waiting at most this long after the first one for more to arrive.
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_WINDOW = 0.1
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS trades (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -53,12 +60,19 @@ CREATE TABLE IF NOT EXISTS idempotency_keys (
     created_at REAL NOT NULL
 );
 CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp);
+-- Covers get_trade_summary: the aggregate scans this index, not the table
+CREATE INDEX IF NOT EXISTS idx_trades_summary ON trades(action, quantity, price);
 CREATE INDEX IF NOT EXISTS idx_activity_ts ON activity_log(timestamp);
+CREATE INDEX IF NOT EXISTS idx_activity_action ON activity_log(action, timestamp);
 """
 
 
 class TradeDB:
-    """Thread-safe singleton SQLite persistence."""
+    """
+    Thread-safe singleton SQLite persistence. Trade and activity inserts
+    are queued and committed in batches by a background writer thread;
+    reads of those tables flush the queue first.
+    """
 
     _instance = None
     _lock = threading.Lock()
@@ -78,6 +92,12 @@ class TradeDB:
         self._db_path = str(DB_PATH)
         self._local = threading.local()
         self._init_schema()
+        self._q: "queue.Queue[tuple]" = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="TradeDB-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.flush)
         self._initialized = True
         log.info(f"TradeDB ready: {self._db_path}")
 
@@ -105,6 +125,56 @@ class TradeDB:
             conn.rollback()
             raise
 
+    # ─── Background writes ────────────────────────────────────
+
+    def _enqueue(self, sql: str, params: tuple) -> None:
+        self._q.put((sql, params))
+
+    def _write_loop(self):
+        """Drain the queue, committing each batch in a single transaction."""
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + WRITE_BATCH_WINDOW
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+    def _write_batch(self, batch: List[tuple]):
+        try:
+            with self._tx() as conn:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+        except Exception as e:
+            # One bad row must not lose the rest: retry individually
+            log.warning(f"Batched write failed ({e}); retrying {len(batch)} rows singly")
+            for sql, params in batch:
+                try:
+                    with self._tx() as conn:
+                        conn.execute(sql, params)
+                except Exception as e2:
+                    log.error(f"Write failed: {e2}")
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until queued writes are committed. False if timeout elapsed."""
+        deadline = time.monotonic() + timeout
+        with self._q.all_tasks_done:
+            while self._q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._q.all_tasks_done.wait(remaining)
+        return True
+
     # ─── Trades ───────────────────────────────────────────────
 
     def log_trade(self, stock_code: str, exchange: str, strike: int,
@@ -114,29 +184,30 @@ class TradeDB:
         try:
             if not trade_id:
                 trade_id = f"{stock_code}_{strike}_{action}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
-            with self._tx() as conn:
-                conn.execute("""
-                    INSERT OR IGNORE INTO trades
-                    (trade_id, timestamp, stock_code, exchange, strike,
-                     option_type, expiry, action, quantity, price, order_type, notes)
-                    VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
-                """, (trade_id, datetime.now().isoformat(), stock_code, exchange,
-                      strike, option_type, expiry, action, quantity, price, order_type, notes))
+            self._enqueue("""
+                INSERT OR IGNORE INTO trades
+                (trade_id, timestamp, stock_code, exchange, strike,
+                 option_type, expiry, action, quantity, price, order_type, notes)
+                VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+            """, (trade_id, datetime.now().isoformat(), stock_code, exchange,
+                  strike, option_type, expiry, action, quantity, price, order_type, notes))
             return True
         except Exception as e:
             log.error(f"log_trade failed: {e}")
             return False
 
-    def get_trades(self, limit: int = 100, stock_code: str = "") -> List[Dict]:
+    def get_trades(self, limit: int = 100, stock_code: str = "",
+                   offset: int = 0) -> List[Dict]:
         try:
+            self.flush()
             conn = self._get_conn()
             q = "SELECT * FROM trades WHERE 1=1"
             params: list = []
             if stock_code:
                 q += " AND stock_code = ?"
                 params.append(stock_code)
-            q += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
+            q += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+            params.extend((limit, offset))
             return [dict(r) for r in conn.execute(q, params).fetchall()]
         except Exception as e:
             log.error(f"get_trades failed: {e}")
@@ -144,6 +215,7 @@ class TradeDB:
 
     def get_trade_summary(self) -> Dict:
         try:
+            self.flush()
             conn = self._get_conn()
             row = conn.execute("""
                 SELECT COUNT(*) as total,
@@ -159,10 +231,8 @@ class TradeDB:
 
     def log_activity(self, action: str, detail: str = "", severity: str = "INFO") -> bool:
         try:
-            conn = self._get_conn()
-            conn.execute("INSERT INTO activity_log (timestamp, action, detail, severity) VALUES (?,?,?,?)",
-                         (datetime.now().isoformat(), action, detail, severity))
-            conn.commit()
+            self._enqueue("INSERT INTO activity_log (timestamp, action, detail, severity) VALUES (?,?,?,?)",
+                          (datetime.now().isoformat(), action, detail, severity))
             return True
         except Exception as e:
             log.error(f"log_activity failed: {e}")
@@ -170,6 +240,7 @@ class TradeDB:
 
     def get_activities(self, limit: int = 100) -> List[Dict]:
         try:
+            self.flush()
             conn = self._get_conn()
             return [dict(r) for r in conn.execute(
                 "SELECT * FROM activity_log ORDER BY timestamp DESC LIMIT ?", (limit,)
@@ -177,6 +248,38 @@ class TradeDB:
         except Exception:
             return []
 
+    def get_activities_by_prefix(self, prefixes: tuple, limit: int = 100) -> List[Dict]:
+        """Newest activities whose action starts with any of prefixes, filtered in SQL."""
+        if not prefixes:
+            return []
+        try:
+            self.flush()
+            conn = self._get_conn()
+            # GLOB is case-sensitive, so SQLite can answer each prefix as a
+            # range on idx_activity_action (LIKE would need a NOCASE index)
+            where = " OR ".join("action GLOB ?" for _ in prefixes)
+            params = [p.replace("[", "[[]").replace("*", "[*]").replace("?", "[?]") + "*"
+                      for p in prefixes]
+            return [dict(r) for r in conn.execute(
+                f"SELECT * FROM activity_log WHERE {where} ORDER BY timestamp DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()]
+        except Exception as e:
+            log.error(f"get_activities_by_prefix failed: {e}")
+            return []
+
+    def iter_activities(self, limit: int = 100) -> Iterator[Dict]:
+        """Newest-first activity rows, read from the cursor as the caller consumes them."""
+        try:
+            self.flush()
+            cur = self._get_conn().execute(
+                "SELECT * FROM activity_log ORDER BY timestamp DESC LIMIT ?", (limit,)
+            )
+            for r in cur:
+                yield dict(r)
+        except Exception as e:
+            log.error(f"iter_activities failed: {e}")
+
     # ─── State snapshots ──────────────────────────────────────
 
     def save_state(self, state: Dict) -> bool:
@@ -55,6 +55,7 @@ class RiskMonitor:
         self._running = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._lock = threading.RLock()
+        self._version = 0
 
     # ─── Position management ──────────────────────────────────
 
@@ -68,10 +69,17 @@ class RiskMonitor:
                 position_type=position_type, quantity=quantity, avg_price=avg_price,
                 current_price=avg_price, high_water_mark=avg_price
             )
+            self._version += 1
 
     def remove_position(self, position_id: str):
         with self._lock:
-            self._positions.pop(position_id, None)
+            if self._positions.pop(position_id, None) is not None:
+                self._version += 1
+
+    @property
+    def positions_version(self) -> int:
+        """Bumped whenever the monitored set changes; pages compare it to invalidate caches."""
+        return self._version
 
     def set_stop_loss(self, position_id: str, stop_price: float):
         with self._lock:
@@ -163,8 +171,8 @@ class RiskMonitor:
                 pos.stock_code, pos.exchange, pos.expiry, pos.strike, pos.option_type
             )
             if resp.get("success"):
-                from helpers import APIResponse, safe_float
-                items = APIResponse(resp).items
+                from helpers import response_items, safe_float
+                items = response_items(resp)
                 if items:
                     ltp = safe_float(items[0].get("ltp", 0))
                     if ltp > 0:
@@ -5,6 +5,8 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 import logging
 import hashlib
+import threading
+import time
 import app_config as C
 
 log = logging.getLogger(__name__)
@@ -135,7 +137,7 @@ class SessionState:
             login_dt = datetime.fromisoformat(lt)
             now = datetime.now(C.IST)
             if login_dt.tzinfo is None:
-                login_dt = C.IST.localize(login_dt)
+                login_dt = login_dt.replace(tzinfo=C.IST)
             s = int((now - login_dt).total_seconds())
             return f"{s // 3600}h {(s % 3600) // 60}m"
         except Exception:
@@ -149,7 +151,7 @@ class SessionState:
         try:
             d = datetime.fromisoformat(lt)
             if d.tzinfo is None:
-                d = C.IST.localize(d)
+                d = d.replace(tzinfo=C.IST)
             return (datetime.now(C.IST) - d).total_seconds() > C.SESSION_WARNING_SECONDS
         except Exception:
             return True
@@ -162,17 +164,47 @@ class SessionState:
         try:
             d = datetime.fromisoformat(lt)
             if d.tzinfo is None:
-                d = C.IST.localize(d)
+                d = d.replace(tzinfo=C.IST)
             return (datetime.now(C.IST) - d).total_seconds() > C.SESSION_TIMEOUT_SECONDS
         except Exception:
             return True
 
 
 class CacheManager:
+    # Process-wide hit/miss counters per cache_type, for TTL tuning
+    _stats: Dict[str, Dict[str, int]] = {}
+    _stats_lock = threading.Lock()
+
     @staticmethod
     def _key(k, t):
         return f"{t}_{hashlib.md5(k.encode()).hexdigest()}"
 
+    @staticmethod
+    def _record(cache_type, event, elapsed_ns=0):
+        with CacheManager._stats_lock:
+            counters = CacheManager._stats.setdefault(cache_type, {
+                "hits": 0, "misses": 0, "expired": 0, "sets": 0,
+                "invalidations": 0, "get_ns": 0
+            })
+            counters[event] += 1
+            counters["get_ns"] += elapsed_ns
+
+    @staticmethod
+    def get_stats() -> Dict[str, Dict[str, float]]:
+        """Per cache_type counters plus hit rate and mean get() latency."""
+        with CacheManager._stats_lock:
+            snapshot = {k: dict(v) for k, v in CacheManager._stats.items()}
+        for v in snapshot.values():
+            lookups = v["hits"] + v["misses"] + v["expired"]
+            v["hit_rate"] = round(v["hits"] / lookups, 3) if lookups else 0.0
+            v["avg_get_us"] = round(v.pop("get_ns") / lookups / 1000, 1) if lookups else 0.0
+        return snapshot
+
+    @staticmethod
+    def reset_stats():
+        with CacheManager._stats_lock:
+            CacheManager._stats.clear()
+
     @staticmethod
     def set(key, value, cache_type="general", ttl=30):
         ck = CacheManager._key(key, cache_type)
@@ -184,24 +216,33 @@ class CacheManager:
             st.session_state[ts_k] = {}
         st.session_state[cache_k][ck] = value
         st.session_state[ts_k][ck] = {"time": datetime.now(), "ttl": ttl}
+        CacheManager._record(cache_type, "sets")
 
     @staticmethod
     def get(key, cache_type="general"):
+        t0 = time.perf_counter_ns()
         ck = CacheManager._key(key, cache_type)
         cache = st.session_state.get(f"{cache_type}_cache", {})
         ts = st.session_state.get(f"{cache_type}_ts", {})
         if ck not in cache:
+            CacheManager._record(cache_type, "misses", time.perf_counter_ns() - t0)
             return None
         if ck in ts:
             info = ts[ck]
             if (datetime.now() - info["time"]).total_seconds() > info["ttl"]:
-                CacheManager.invalidate(key, cache_type)
+                CacheManager._drop(ck, cache_type)
+                CacheManager._record(cache_type, "expired", time.perf_counter_ns() - t0)
                 return None
+        CacheManager._record(cache_type, "hits", time.perf_counter_ns() - t0)
         return cache[ck]
 
     @staticmethod
     def invalidate(key, cache_type="general"):
-        ck = CacheManager._key(key, cache_type)
+        CacheManager._drop(CacheManager._key(key, cache_type), cache_type)
+        CacheManager._record(cache_type, "invalidations")
+
+    @staticmethod
+    def _drop(ck, cache_type):
         st.session_state.get(f"{cache_type}_cache", {}).pop(ck, None)
         st.session_state.get(f"{cache_type}_ts", {}).pop(ck, None)
 
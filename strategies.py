@@ -106,15 +106,14 @@ def calculate_strategy_metrics(legs: List[StrategyLeg]) -> Dict[str, Any]:
     high = max(all_strikes) + 10 * spread
     spots = np.linspace(low, high, 500)
     payoffs = _calc_payoffs(legs, spots)
-    breakevens = []
-    for i in range(len(payoffs) - 1):
-        if payoffs[i] * payoffs[i + 1] < 0:
-            be = spots[i] - payoffs[i] * (spots[i + 1] - spots[i]) / (payoffs[i + 1] - payoffs[i])
-            breakevens.append(round(float(be), 0))
+    # Sign changes between neighbouring grid points, linearly interpolated
+    i = np.flatnonzero(payoffs[:-1] * payoffs[1:] < 0)
+    be = spots[i] - payoffs[i] * (spots[i + 1] - spots[i]) / (payoffs[i + 1] - payoffs[i])
+    breakevens = [round(float(b), 0) for b in be]
     return {
         "net_premium": round(net_premium, 2),
-        "max_profit": round(float(max(payoffs)), 2),
-        "max_loss": round(float(min(payoffs)), 2),
+        "max_profit": round(float(payoffs.max()), 2),
+        "max_loss": round(float(payoffs.min()), 2),
         "breakevens": breakevens,
     }
 
@@ -132,14 +131,15 @@ def generate_payoff_data(legs: List[StrategyLeg], center: float,
 
 
 def _calc_payoffs(legs: List[StrategyLeg], spots: np.ndarray) -> np.ndarray:
-    payoffs = np.zeros(len(spots))
-    for leg in legs:
-        if leg.option_type == "CE":
-            intrinsic = np.maximum(spots - leg.strike, 0)
-        else:
-            intrinsic = np.maximum(leg.strike - spots, 0)
-        if leg.action == "sell":
-            payoffs += (leg.premium - intrinsic) * leg.quantity
-        else:
-            payoffs += (intrinsic - leg.premium) * leg.quantity
-    return payoffs
+    """Expiry P&L at each spot: one (spots × legs) broadcast, summed over legs."""
+    strikes = np.array([l.strike for l in legs], dtype=float)
+    is_call = np.array([l.option_type == "CE" for l in legs])
+    premium = np.array([l.premium for l in legs], dtype=float)
+    # buy → +qty, sell → -qty
+    signed_qty = np.array(
+        [-l.quantity if l.action == "sell" else l.quantity for l in legs],
+        dtype=float
+    )
+    moneyness = np.asarray(spots, dtype=float)[:, None] - strikes
+    intrinsic = np.maximum(np.where(is_call, moneyness, -moneyness), 0.0)
+    return (intrinsic - premium) @ signed_qty
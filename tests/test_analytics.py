@@ -0,0 +1,26 @@
+"""Parity checks for the vectorized analytics helpers."""
+
+import numpy as np
+import pytest
+
+from analytics import calculate_var
+
+
+@pytest.mark.parametrize("n", [1, 10, 100, 255])
+def test_var_short_series_matches_percentile(n):
+    # Below 256 returns calculate_var keeps np.percentile's interpolation
+    returns = np.random.default_rng(n).normal(0.0, 0.01, n)
+    assert calculate_var(returns, 0.95) == pytest.approx(np.percentile(returns, 5.0))
+
+
+@pytest.mark.parametrize("n", [256, 500, 3000])
+@pytest.mark.parametrize("confidence", [0.95, 0.99])
+def test_var_long_series_is_order_statistic(n, confidence):
+    returns = np.random.default_rng(n).normal(0.0, 0.01, n)
+    k = int((1 - confidence) * n)
+    assert calculate_var(returns, confidence) == np.sort(returns)[k]
+
+
+def test_var_empty():
+    assert calculate_var([]) == 0.0
+    assert calculate_var(None) == 0.0